@@ -0,0 +1,228 @@
+"""
+Bytes per segment for the EDI 822 segment records and object graph.
+
+Compares the old representation (dict segments with list elements, plain
+dataclasses with a per-instance __dict__, party dicts copied into every account,
+a fresh string per code) against the current one (Segment tuples, slotted
+dataclasses, shared party tuples, interned codes) on data/JPMC.822 repeated
+--scale times, or on a synthetic summary statement with --synthetic ACCOUNTS.
+
+A second table compares the raw= modes (keep / lazy / drop) on one pass over the
+file. Lazy RawRefs point into a memory map, which lives in the page cache rather
+than on the Python heap.
+
+Interchanges are measured one at a time, so the run itself stays small even
+at the default 1000x scale.
+
+    python benchmarks/bench_822_memory.py --scale 1000
+    python benchmarks/bench_822_memory.py --synthetic 20000 --scale 1
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from dataclasses import fields, is_dataclass, make_dataclass, field
+from pathlib import Path
+from typing import Any, Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src import x12ediparser
+from src.x12_822 import Party
+from src.x12_tokenizer import MappedSource, iter_interchange_segments
+
+DEFAULT_SOURCE = Path(__file__).resolve().parents[1] / "data" / "JPMC.822"
+
+
+class RepeatedReader:
+    """
+    File-like object that serves `text` `times` times without building the big string.
+    """
+
+    def __init__(self, text: str, times: int):
+        self._text = text
+        self._left = times
+        self._pos = 0
+
+    def read(self, size: int = -1) -> str:
+        if self._left <= 0:
+            return ""
+        out = self._text[self._pos:self._pos + size] if size > 0 else self._text[self._pos:]
+        self._pos += len(out)
+        if self._pos >= len(self._text):
+            self._pos = 0
+            self._left -= 1
+        return out
+
+
+def synthetic_822(accounts: int, services: int = 12, balances: int = 8, accounts_per_ent: int = 100) -> str:
+    """
+    One summary statement with `accounts` ACT loops under shared BK/AO parties, like a large
+    relationship statement: the same service codes and balance codes repeat in every account.
+    """
+    segs = [
+        "GS*AA*SYNTHETIC BANK*CUSTOMER*20250715*1005*1*X*004010",
+        "ST*822*0001",
+        "BGN*05*1000000000*20250715*100030*LT*1000000000",
+        "DTM*009*20250715",
+        "DTM*150*20250601",
+        "DTM*151*20250630",
+        "N1*BK*SYNTHETIC BANK*13*075000022",
+    ]
+    for a in range(accounts):
+        if a % accounts_per_ent == 0:
+            segs += [
+                f"ENT*{a // accounts_per_ent + 1}*BK*13*075000022*AO*ZZ*CUSTOMER HOLDINGS",
+                "N1*BK*SYNTHETIC BANK",
+                "N1*AO*CUSTOMER HOLDINGS",
+            ]
+        segs += [f"ACT*{9000000000 + a}*OPERATING ACCOUNT****{9000000000 - a % accounts_per_ent}", "CUR*BK*USD", "LX*1"]
+        segs += [f"BLN*TE*{b * 10:06d}*{a + b}.{b:02d}" for b in range(balances)]
+        segs += [
+            f"SER*TB*{6000000000 + s}*{a * 3 + s}.00*{s + 1}.00*{s % 4 + 1}.0000*{a % 7 + s}*SERVICE DESCRIPTION {s}**B"
+            for s in range(services)
+        ]
+    segs.append(f"SE*{len(segs)}*0001")
+    segs += ["GE*1*1", "IEA*1*000000001"]
+    isa = "ISA*00*          *00*          *ZZ*SYNTHETIC BANK *ZZ*CUSTOMER       *250715*1005*U*00401*000000001*0*P*>"
+    return "~".join([isa] + segs) + "~"
+
+
+def deep_size(obj: Any, seen: set) -> int:
+    if id(obj) in seen or obj is None:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += deep_size(k, seen) + deep_size(v, seen)
+    elif isinstance(obj, (list, tuple)):
+        for v in obj:
+            size += deep_size(v, seen)
+    elif is_dataclass(obj):
+        if hasattr(obj, "__dict__"):
+            size += deep_size(obj.__dict__, seen)
+        else:
+            for f in fields(obj):
+                size += deep_size(getattr(obj, f.name), seen)
+    elif hasattr(type(obj), "__slots__") and not isinstance(obj, (str, bytes, int, float)):
+        for name in type(obj).__slots__:
+            size += deep_size(getattr(obj, name, None), seen)
+    return size
+
+
+_LEGACY: Dict[type, type] = {}
+
+
+def _legacy_class(cls: type) -> type:
+    if cls not in _LEGACY:
+        _LEGACY[cls] = make_dataclass(
+            "Legacy" + cls.__name__,
+            [(f.name, Any, field(default=None)) for f in fields(cls)],
+        )
+    return _LEGACY[cls]
+
+
+def to_legacy(obj: Any) -> Any:
+    """
+    Rebuilds the old shape: plain dataclasses, lists instead of tuples, a dict per party per
+    account, and a separate copy of every string longer than one character (nothing interned).
+    """
+    if isinstance(obj, Party):
+        return {f.name: to_legacy(getattr(obj, f.name)) for f in fields(obj)}
+    if isinstance(obj, str):
+        return obj[:1] + obj[1:] if len(obj) > 1 else obj
+    if is_dataclass(obj):
+        return _legacy_class(type(obj))(**{f.name: to_legacy(getattr(obj, f.name)) for f in fields(obj)})
+    if isinstance(obj, (list, tuple)):
+        return [to_legacy(v) for v in obj]
+    if isinstance(obj, dict):
+        return {k: to_legacy(v) for k, v in obj.items()}
+    return obj
+
+
+def measure(text: str, scale: int) -> Dict[str, float]:
+    totals = {"segments": 0, "seg_old": 0, "seg_new": 0, "model_old": 0, "model_new": 0}
+
+    for group in iter_interchange_segments(RepeatedReader(text, scale)):
+        segments = list(group)
+        legacy_segments = [{"tag": s.tag, "elements": list(s.elements), "raw": s.raw} for s in segments]
+        ic = x12ediparser.extract_822(segments)
+
+        totals["segments"] += len(segments)
+        totals["seg_new"] += deep_size(segments, set())
+        totals["seg_old"] += deep_size(legacy_segments, set())
+        totals["model_new"] += deep_size(ic, set())
+        totals["model_old"] += deep_size(to_legacy(ic), set())
+
+    n = totals["segments"] or 1
+    return {
+        "segments": totals["segments"],
+        "segment_bytes_old": totals["seg_old"] / n,
+        "segment_bytes_new": totals["seg_new"] / n,
+        "model_bytes_old": totals["model_old"] / n,
+        "model_bytes_new": totals["model_new"] / n,
+    }
+
+
+def measure_raw_modes(path: str) -> Dict[str, float]:
+    """
+    822 object graph bytes/segment for raw="keep", "lazy" and "drop" on one pass over `path`.
+    """
+    out: Dict[str, float] = {}
+    for mode in ("keep", "lazy", "drop"):
+        source = MappedSource(path) if mode == "lazy" else open(path, "r", encoding="utf-8", newline="")
+        size = segments = 0
+        for group in iter_interchange_segments(source, raw=mode):
+            group = list(group)
+            segments += len(group)
+            size += deep_size(x12ediparser.extract_822(group), set())
+        if mode != "lazy":
+            source.close()
+        out[mode] = size / (segments or 1)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--source", type=Path, default=DEFAULT_SOURCE)
+    ap.add_argument("--scale", type=int, default=1000)
+    ap.add_argument("--synthetic", type=int, metavar="ACCOUNTS", help="use a generated statement with this many ACT loops")
+    args = ap.parse_args()
+
+    tmp = None
+    if args.synthetic:
+        label = f"synthetic 822, {args.synthetic} accounts"
+        text = synthetic_822(args.synthetic)
+        tmp = tempfile.NamedTemporaryFile("w", suffix=".822", delete=False, encoding="utf-8")
+        with tmp:
+            tmp.write(text)
+        raw_path = tmp.name
+    else:
+        label = str(args.source)
+        text = args.source.read_text(encoding="utf-8")
+        raw_path = str(args.source)
+
+    t0 = time.perf_counter()
+    r = measure(text, args.scale)
+    elapsed = time.perf_counter() - t0
+
+    print(f"source: {label} x{args.scale}  segments: {r['segments']}  ({elapsed:.1f}s)")
+    print(f"{'bytes/segment':<22}{'before':>10}{'after':>10}{'saved':>8}")
+    for label, old, new in (
+        ("segment records", r["segment_bytes_old"], r["segment_bytes_new"]),
+        ("822 object graph", r["model_bytes_old"], r["model_bytes_new"]),
+    ):
+        print(f"{label:<22}{old:>10.1f}{new:>10.1f}{(1 - new / old) * 100:>7.1f}%")
+
+    modes = measure_raw_modes(raw_path)
+    if tmp is not None:
+        os.unlink(tmp.name)
+    print(f"\n{'raw= (graph bytes/seg)':<22}{'keep':>10}{'lazy':>10}{'drop':>10}")
+    print(f"{'822 object graph':<22}{modes['keep']:>10.1f}{modes['lazy']:>10.1f}{modes['drop']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Query latency of the partitioned billing store (src.billing_store) over years of history.
+
+Builds a store of --years of monthly statements from both sources. Each month holds one 822
+and one TWIST batch, with --services charges for each of --accounts account ids. The charge
+lines are drawn from the rows parse_edi / parse_twist return for data/JPMC.822 and
+data/Sample_Parser.xml, then re-dated into the month.
+
+Reported:
+  - build time, store and index size;
+  - time to open the store and load the index;
+  - per query, p50 and max latency of --queries random accounts, for the last 12 months
+    and for the whole history, each on a fresh store object so every index load is counted.
+
+    python benchmarks/bench_billing_store.py --years 5 --accounts 5000
+"""
+
+import argparse
+import datetime as dt
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_suite import ROOT, _load
+from src.billing_store import DEFAULT_ROW_GROUP_SIZE, BillingStore, months_back
+
+DATA = ROOT / "data"
+
+
+def templates() -> Dict[str, List[Dict[str, Any]]]:
+    ediparser = _load("ediparser", ROOT / "ediparser")
+    twist = _load("twist_parser_top", ROOT / "twist parser")
+    with open(DATA / "JPMC.822", encoding="utf-8", newline="") as f:
+        edi = ediparser.parse_edi(f, engine="native")
+    return {"EDI": edi, "TWIST": twist.parse_twist(str(DATA / "Sample_Parser.xml"))}
+
+
+def month_rows(
+    lines: List[Dict[str, Any]], accounts: List[str], services: int, year: int, month: int, rng: random.Random
+) -> Iterator[Dict[str, Any]]:
+    start = dt.date(year, month, 1)
+    end = (start + dt.timedelta(days=32)).replace(day=1) - dt.timedelta(days=1)
+    invoice = end + dt.timedelta(days=10)
+    for account in accounts:
+        for line in rng.sample(lines, min(services, len(lines))):
+            yield {**line, "account_id": account, "from_dt": start.strftime("%Y%m%d"),
+                   "to_dt": end.strftime("%Y%m%d"), "invoice_dt": invoice.strftime("%Y%m%d")}
+
+
+def timed_queries(directory: Path, accounts: List[str], months: int, until: dt.date) -> List[float]:
+    out = []
+    for account in accounts:
+        t0 = time.perf_counter()
+        rows = BillingStore(directory).account_charges(account, months, until)
+        out.append(time.perf_counter() - t0)
+        if not rows:
+            raise SystemExit(f"no rows for {account}")
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--years", type=int, default=5)
+    ap.add_argument("--accounts", type=int, default=5000)
+    ap.add_argument("--services", type=int, default=4, help="charges per account per source per month")
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--row-group-size", type=int, default=DEFAULT_ROW_GROUP_SIZE)
+    ap.add_argument("--seed", type=int, default=822)
+    ap.add_argument("--workdir", type=Path, help="where the store goes (default: a temporary directory)")
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    lines = templates()
+    accounts = sorted({str(rng.randrange(10**11, 10**12)) for _ in range(args.accounts)})
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="billing_store_"))
+    store = BillingStore(workdir, args.row_group_size)
+
+    t0 = time.perf_counter()
+    rows = 0
+    first = dt.date.today().year - args.years + 1
+    for year in range(first, first + args.years):
+        for month in range(1, 13):
+            for source, template in lines.items():
+                batch = f"{source}-{year}-{month:02d}"
+                rows += store.add(month_rows(template, accounts, args.services, year, month, rng), batch=batch)
+    build = time.perf_counter() - t0
+    until = dt.date(first + args.years - 1, 12, 31)
+
+    size = sum(p.stat().st_size for p in workdir.rglob("*.parquet"))
+    index = (workdir / "index.json").stat().st_size
+    print(f"store: {workdir}")
+    print(f"{rows} rows, {len(store.files)} files, {size / 1e6:.1f} MB parquet, {index / 1e3:.0f} KB index, built in {build:.1f}s")
+
+    t0 = time.perf_counter()
+    n = len(BillingStore(workdir).files)
+    print(f"open + index load: {(time.perf_counter() - t0) * 1e3:.1f} ms ({n} files)")
+
+    picks = rng.sample(accounts, min(args.queries, len(accounts)))
+    print(f"{'query':<34}{'p50 ms':>10}{'max ms':>10}")
+    for label, months in (("last 12 months", 12), (f"all {args.years * 12} months", args.years * 12)):
+        times = timed_queries(workdir, picks, months, until)
+        label = f"{label} ({months_back(until, months)}..)"
+        print(f"{label:<34}{statistics.median(times) * 1e3:>10.1f}{max(times) * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Throughput and memory of every EDI 822 and TWIST parser entry point, with a regression gate.
+
+Inputs are generated from the files in data/ by seedable generators: data/JPMC.822 and
+data/Sample1.decrypted repeated --edi-copies times (account ids re-drawn per copy),
+data/Sample_Parser.xml and data/Oracle_Parser.xml with their <electronicStatement> blocks
+repeated --twist-copies times (bban/iban re-drawn per copy). The same --seed gives the
+same files byte for byte.
+
+Each entry point runs in its own process over each input it reads, so peak RSS is its own.
+Reported per run: the fastest of --repeat calls in seconds, segments/s (EDI) or services/s (TWIST), rows returned, peak RSS,
+and the memory blocks still allocated once the call returns (sys.getallocatedblocks).
+--trace adds a second, tracemalloc'd run for peak traced bytes and the allocation count
+at that peak.
+
+--json writes the results; --baseline compares against an earlier --json file and exits 1
+when throughput drops or peak RSS grows by more than --threshold (fraction) for any run.
+
+    python benchmarks/bench_suite.py --edi-copies 50 --twist-copies 50 --json results.json
+    python benchmarks/bench_suite.py --baseline results.json --threshold 0.15
+    python benchmarks/bench_suite.py --only "twist" --trace
+"""
+
+import argparse
+import gc
+import importlib.machinery
+import importlib.util
+import json
+import platform
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+DATA = ROOT / "data"
+
+
+# ---- seedable input generators ----
+def _redraw_digits(value: str, rng: random.Random) -> str:
+    return "".join(str(rng.randrange(10)) if c.isdigit() else c for c in value)
+
+
+def scaled_822(text: str, copies: int, seed: int) -> Iterator[str]:
+    """The 822 file `copies` times; every copy gets its own ACT account ids (same length)."""
+    element_sep = text[text.index("ISA") + 3]
+    act = re.compile(re.escape(f"ACT{element_sep}") + r"([0-9]+)")
+    rng = random.Random(seed)
+    for _ in range(copies):
+        ids: Dict[str, str] = {}
+        yield act.sub(lambda m: f"ACT{element_sep}" + ids.setdefault(m.group(1), _redraw_digits(m.group(1), rng)), text)
+
+
+_TWIST_IDS = re.compile(r"<((?:\w+:)?(?:bban|iban))>([^<]*)</\1>")
+
+
+def scaled_twist(text: str, copies: int, seed: int) -> Iterator[str]:
+    """The TWIST file with its <electronicStatement> blocks repeated; bban/iban re-drawn per copy."""
+    start = text.index("<electronicStatement")
+    end = text.rindex("</electronicStatement>") + len("</electronicStatement>")
+    body = text[start:end]
+    rng = random.Random(seed)
+    yield text[:start]
+    for _ in range(copies):
+        ids: Dict[str, str] = {}
+        yield _TWIST_IDS.sub(lambda m: f"<{m.group(1)}>{ids.setdefault(m.group(2), _redraw_digits(m.group(2), rng))}</{m.group(1)}>", body)
+    yield text[end:]
+
+
+def _segment_count(text: str) -> int:
+    from src.x12ediparser import detect_separators_from_isa
+
+    _, _, seg_term = detect_separators_from_isa(text, text.index("ISA"))
+    return text.count(seg_term)
+
+
+# name -> (source file, generator, unit, units in one copy of the source)
+INPUTS: Dict[str, Tuple[Path, Callable[[str, int, int], Iterator[str]], str, Callable[[str], int]]] = {
+    "JPMC.822": (DATA / "JPMC.822", scaled_822, "segments", _segment_count),
+    "Sample1.decrypted": (DATA / "Sample1.decrypted", scaled_822, "segments", _segment_count),
+    "Sample_Parser.xml": (DATA / "Sample_Parser.xml", scaled_twist, "services", lambda t: len(re.findall(r"<(?:\w+:)?service>", t))),
+    "Oracle_Parser.xml": (DATA / "Oracle_Parser.xml", scaled_twist, "services", lambda t: len(re.findall(r"<(?:\w+:)?service>", t))),
+}
+EDI_INPUTS = ("JPMC.822", "Sample1.decrypted")
+TWIST_INPUTS = ("Sample_Parser.xml",)
+
+
+def write_inputs(workdir: Path, edi_copies: int, twist_copies: int, seed: int) -> Dict[str, Dict[str, Any]]:
+    out = {}
+    for name, (source, generate, unit, count) in INPUTS.items():
+        text = source.read_text(encoding="utf-8")
+        copies = edi_copies if generate is scaled_822 else twist_copies
+        path = workdir / f"{copies}x_{seed}_{name}"
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            for chunk in generate(text, copies, seed):
+                f.write(chunk)
+        out[name] = {"path": str(path), "copies": copies, "unit": unit, "units": count(text) * copies,
+                     "bytes": path.stat().st_size}
+    return out
+
+
+# ---- entry points ----
+def _load(name: str, path: Path):
+    # the top-level parsers are files without a .py suffix
+    loader = importlib.machinery.SourceFileLoader(name, str(path))
+    spec = importlib.util.spec_from_loader(name, loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def _count(result) -> int:
+    if hasattr(result, "interchanges") and not hasattr(result, "__len__"):  # EDI822Document
+        return sum(len(a.service_charges) for ic in result.interchanges for t in ic.transactions_822 for a in t.accounts)
+    if hasattr(result, "electronic_statement_list"):  # twist_old TwistDocument
+        return sum(len(st.services) for es in result.electronic_statement_list for st in es.statement_list)
+    if isinstance(result, dict):  # collect_records
+        return sum(len(rows) for rows in result.values())
+    return len(result)
+
+
+def _with_handle(func: Callable[..., Any], kw: Dict[str, Any]) -> Callable[[str], Any]:
+    def call(path: str):
+        with open(path, encoding="utf-8", newline="") as f:
+            return func(f, **kw)
+    return call
+
+
+# each factory returns prepare(): imports happen there, outside the timed call
+def _ediparser(fn: str, **kw):
+    return lambda: _with_handle(getattr(_load("ediparser", ROOT / "ediparser"), fn), kw)
+
+
+def _twist(fn: str, **kw):
+    return lambda: partial(getattr(_load("twist_parser_top", ROOT / "twist parser"), fn), **kw)
+
+
+def _src(module: str, fn: str, **kw):
+    return lambda: partial(getattr(importlib.import_module(module), fn), **kw)
+
+
+def _src_open(module: str, fn: str, **kw):
+    return lambda: _with_handle(getattr(importlib.import_module(module), fn), kw)
+
+
+def _src_list(module: str, fn: str, **kw):
+    # generator entry points, drained into a list
+    def prepare():
+        func = getattr(importlib.import_module(module), fn)
+        return lambda path: list(func(path, **kw))
+    return prepare
+
+
+# name -> (inputs, prepare() -> call(path) -> result)
+ENTRY_POINTS: Dict[str, Tuple[Tuple[str, ...], Callable[[], Callable[[str], Any]]]] = {
+    "ediparser.parse_edi[x12-edi-tools]": (EDI_INPUTS, _ediparser("parse_edi")),
+    "ediparser.parse_edi[native]": (EDI_INPUTS, _ediparser("parse_edi", engine="native")),
+    "ediparser.parse_edi_columns[native]": (EDI_INPUTS, _ediparser("parse_edi_columns", engine="native")),
+    "ediparser.reconcile_edi[native]": (EDI_INPUTS, _ediparser("reconcile_edi", engine="native", all_rows=True)),
+    "ediparser_new.parse_edi[x12-edi-tools]": (EDI_INPUTS, _src_open("src.ediparser_new", "parse_edi")),
+    "ediparser_new.parse_edi[native]": (EDI_INPUTS, _src_open("src.ediparser_new", "parse_edi", engine="native")),
+    "x12ediparser.read_edi822_blocking": (EDI_INPUTS, _src("src.x12ediparser", "read_edi822_blocking", raw="drop")),
+    "x12editool.read_edi822_blocking[native]": (EDI_INPUTS, _src("src.x12editool", "read_edi822_blocking", engine="native", raw="drop")),
+    "twist parser.parse_twist[etree]": (TWIST_INPUTS, _twist("parse_twist", backend="etree")),
+    "twist parser.parse_twist[lxml]": (TWIST_INPUTS, _twist("parse_twist", backend="lxml")),
+    "twist_parser_latest.parse_twist_flat_service_rows": (TWIST_INPUTS, _src("src.twist_parser_latest", "parse_twist_flat_service_rows")),
+    "twist_parser_service.parse_twist_flat_service_rows": (TWIST_INPUTS, _src("src.twist_parser_service", "parse_twist_flat_service_rows")),
+    "twist_parser.parse_all_compensations": (TWIST_INPUTS, _src("src.twist_parser", "parse_all_compensations")),
+    "twist_records.collect_records": (TWIST_INPUTS, _src("src.twist_records", "collect_records")),
+    # a plain file is a one-member bundle
+    "bundle.iter_bundle_rows": (EDI_INPUTS + TWIST_INPUTS, _src_list("src.bundle", "iter_bundle_rows", workers=1)),
+    # namespace-less documents only
+    "twist_old.parse_twist_multi": (("Oracle_Parser.xml",), _src("src.twist_old.parser", "parse_twist_multi")),
+}
+
+
+def run_one(entry: str, path: str, trace: bool, repeat: int = 1) -> Dict[str, Any]:
+    """Runs in the child process: one entry point on one file, best of `repeat` calls."""
+    call = ENTRY_POINTS[entry][1]()
+    seconds = float("inf")
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        blocks = sys.getallocatedblocks()
+        t0 = time.perf_counter()
+        result = call(path)
+        seconds = min(seconds, time.perf_counter() - t0)
+    out = {
+        "seconds": seconds,
+        "rows": _count(result),
+        "retained_blocks": sys.getallocatedblocks() - blocks,
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+    }
+    if trace:
+        del result
+        gc.collect()
+        tracemalloc.start()
+        result = call(path)
+        snapshot = tracemalloc.take_snapshot()
+        out["traced_peak_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+        out["traced_blocks"] = sum(stat.count for stat in snapshot.statistics("filename"))
+        tracemalloc.stop()
+    return out
+
+
+# ---- regression gate ----
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], threshold: float) -> List[str]:
+    """Regression messages for runs slower (throughput) or bigger (peak RSS) than the baseline by > threshold."""
+    previous = {(r["entry"], r["input"], r["units"]): r for r in baseline}
+    failures = []
+    for r in results:
+        base = previous.get((r["entry"], r["input"], r["units"]))
+        if base is None or "error" in r or "error" in base:
+            continue
+        if r["throughput"] < base["throughput"] * (1 - threshold):
+            failures.append(f"{r['entry']} on {r['input']}: {r['throughput']:.0f} {r['unit']}/s vs {base['throughput']:.0f} baseline")
+        if r["peak_rss_mb"] > base["peak_rss_mb"] * (1 + threshold):
+            failures.append(f"{r['entry']} on {r['input']}: peak RSS {r['peak_rss_mb']:.0f} MB vs {base['peak_rss_mb']:.0f} MB baseline")
+    return failures
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--edi-copies", type=int, default=20)
+    ap.add_argument("--twist-copies", type=int, default=50)
+    ap.add_argument("--seed", type=int, default=822)
+    ap.add_argument("--only", help="regex; run only the entry points whose name matches")
+    ap.add_argument("--repeat", type=int, default=3, help="calls per run; the fastest is reported")
+    ap.add_argument("--trace", action="store_true", help="also measure tracemalloc peak and allocation count")
+    ap.add_argument("--workdir", type=Path, help="where the generated inputs go (default: a temporary directory)")
+    ap.add_argument("--json", type=Path, help="write the results here")
+    ap.add_argument("--baseline", type=Path, help="results JSON of an earlier run to compare against")
+    ap.add_argument("--threshold", type=float, default=0.2, help="allowed regression as a fraction (default 0.2)")
+    ap.add_argument("--child", nargs=2, metavar=("ENTRY", "PATH"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        try:
+            print(json.dumps(run_one(args.child[0], args.child[1], args.trace, args.repeat)))
+        except Exception as e:
+            print(json.dumps({"error": f"{type(e).__name__}: {e}"}))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or Path(tmp)
+        workdir.mkdir(parents=True, exist_ok=True)
+        inputs = write_inputs(workdir, args.edi_copies, args.twist_copies, args.seed)
+        for name, info in inputs.items():
+            print(f"input {name:<20} x{info['copies']:<6}{info['bytes'] / 1e6:>8.1f} MB {info['units']:>10} {info['unit']}")
+
+        print(f"\n{'entry point':<52}{'input':<20}{'s':>8}{'units/s':>12}{'rows':>9}{'RSS MB':>8}{'blocks':>10}")
+        results = []
+        for entry, (names, _) in ENTRY_POINTS.items():
+            if args.only and not re.search(args.only, entry):
+                continue
+            for name in names:
+                info = inputs[name]
+                cmd = [sys.executable, __file__, "--child", entry, info["path"], "--repeat", str(args.repeat)]
+                cmd += ["--trace"] if args.trace else []
+                proc = subprocess.run(cmd, capture_output=True, text=True)
+                lines = proc.stdout.strip().splitlines()
+                run = json.loads(lines[-1]) if lines else {"error": proc.stderr.strip().splitlines()[-1:] or "no output"}
+                run.update(entry=entry, input=name, unit=info["unit"], units=info["units"], bytes=info["bytes"])
+                if "error" in run:
+                    print(f"{entry:<52}{name:<20}  failed: {run['error']}")
+                else:
+                    run["throughput"] = info["units"] / run["seconds"]
+                    print(f"{entry:<52}{name:<20}{run['seconds']:>8.2f}{run['throughput']:>12.0f}{run['rows']:>9}"
+                          f"{run['peak_rss_mb']:>8.0f}{run['retained_blocks']:>10}"
+                          + (f"  traced peak {run['traced_peak_mb']:.1f} MB, {run['traced_blocks']} blocks" if args.trace else ""))
+                results.append(run)
+
+    if args.json:
+        args.json.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "seed": args.seed,
+            "results": results,
+        }, indent=2))
+        print(f"\nresults: {args.json}")
+
+    if args.baseline:
+        failures = compare(results, json.loads(args.baseline.read_text())["results"], args.threshold)
+        if failures:
+            print(f"\n{len(failures)} regression(s) beyond {args.threshold:.0%}:")
+            for line in failures:
+                print("  " + line)
+            raise SystemExit(1)
+        print(f"\nno regressions beyond {args.threshold:.0%} against {args.baseline}")
+    if any("error" in r for r in results):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
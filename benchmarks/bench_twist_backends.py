@@ -0,0 +1,79 @@
+"""
+TWIST parsing throughput with the stdlib ElementTree backend vs lxml.
+
+Streams data/Sample_Parser.xml with its <electronicStatement> blocks repeated --scale times
+(generated on the fly) through iter_service_rows (parse_twist) and iter_compensations
+(parse_all_compensations) with each backend, and checks both produce the same rows.
+With --workers N the service rows are also parsed from a temporary copy of the file split
+at its electronicStatement blocks (twist_parallel), N processes.
+
+    python benchmarks/bench_twist_backends.py --scale 2000
+    python benchmarks/bench_twist_backends.py --scale 2000 --workers 4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_twist_services import RepeatedStatements
+from src.twist_parallel import iter_rows_parallel
+from src.twist_stream import _lxml_etree, iter_compensations, iter_service_rows
+
+DEFAULT_SOURCE = Path(__file__).resolve().parents[1] / "data" / "Sample_Parser.xml"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--source", type=Path, default=DEFAULT_SOURCE)
+    ap.add_argument("--scale", type=int, default=2000)
+    ap.add_argument("--workers", type=int, default=1, help="also time parallel parsing with this many processes")
+    args = ap.parse_args()
+
+    backends = ["etree"] + (["lxml"] if _lxml_etree() is not None else [])
+    if len(backends) == 1:
+        print("lxml is not installed; only the etree backend is measured (pip install lxml)")
+
+    text = args.source.read_text(encoding="utf-8")
+    mb = len(text.encode("utf-8")) * args.scale / 1e6
+    print(f"source: {args.source} x{args.scale}  (~{mb:.0f} MB)")
+    print(f"{'entry point':<22}{'backend':>8}{'rows':>10}{'seconds':>10}{'MB/s':>8}")
+
+    for label, run in (("service rows", iter_service_rows), ("compensations", iter_compensations)):
+        results = {}
+        for backend in backends:
+            t0 = time.perf_counter()
+            rows = list(run(RepeatedStatements(text, args.scale), backend=backend))
+            elapsed = time.perf_counter() - t0
+            results[backend] = rows
+            print(f"{label:<22}{backend:>8}{len(rows):>10}{elapsed:>10.2f}{mb / elapsed:>8.1f}")
+        if len(results) > 1 and results["etree"] != results["lxml"]:
+            raise SystemExit(f"{label}: backends disagree")
+        if label == "service rows":
+            expected = results[backends[-1]]
+
+    if args.workers > 1:
+        reader = RepeatedStatements(text, args.scale)
+        with tempfile.NamedTemporaryFile("wb", suffix=".xml", delete=False) as tmp:
+            for chunk in iter(reader.read, b""):
+                tmp.write(chunk)
+        try:
+            for backend in backends:
+                t0 = time.perf_counter()
+                rows = list(iter_rows_parallel(tmp.name, partial(iter_service_rows, backend=backend), args.workers, 4))
+                elapsed = time.perf_counter() - t0
+                label = f"service rows x{args.workers}"
+                print(f"{label:<22}{backend:>8}{len(rows):>10}{elapsed:>10.2f}{mb / elapsed:>8.1f}")
+                if rows != expected:
+                    raise SystemExit("parallel rows differ from the sequential run")
+        finally:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Memory held by the twist_old object model, measured with tracemalloc.
+
+Builds a namespace-less document from data/Oracle_Parser.xml with its <service> blocks
+repeated --per-statement times per statement and the electronicStatement repeated until
+the document holds --services services (500k by default; generated on the fly), parses it
+with twist_old.parser.parse_twist_multi and reports the memory the result keeps alive.
+
+The parsed document is then rebuilt twice over the same strings: once with the current
+slotted classes (absent amounts share NO_MONEY) and once with the previous layout (plain
+dataclasses with a __dict__, a Money object for every amount), so the difference is
+the object model alone. The run exits 1 when the slotted model saves less than
+--min-reduction (default 0.3) of the previous layout's memory, e.g. after a change that
+brings back a Money(None, None) per absent amount.
+
+    python benchmarks/bench_twist_model_memory.py --services 500000
+"""
+
+import argparse
+import dataclasses
+import math
+import os
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_twist_services import RepeatedStatements
+from src.twist_old import model
+from src.twist_old.model import Money, money
+from src.twist_old.parser import parse_twist_multi
+
+DEFAULT_SOURCE = Path(__file__).resolve().parents[1] / "data" / "Oracle_Parser.xml"
+
+_SERVICES = re.compile(r"(\s*<service>.*?</service>)+", re.S)
+
+
+def synthetic_text(text: str, per_statement: int) -> str:
+    """The source with its run of <service> blocks repeated up to per_statement services."""
+    run = _SERVICES.search(text)
+    if run is None:
+        raise SystemExit("source has no <service> elements")
+    blocks = re.findall(r"\s*<service>.*?</service>", run.group(0), re.S)
+    body = "".join(blocks[i % len(blocks)] for i in range(per_statement))
+    return text[:run.start()] + body + text[run.end():]
+
+
+def _legacy_classes() -> Dict[type, type]:
+    # the model as it was: @dataclass without slots
+    out = {}
+    for cls in vars(model).values():
+        if dataclasses.is_dataclass(cls) and isinstance(cls, type):
+            out[cls] = dataclasses.make_dataclass(cls.__name__, [f.name for f in dataclasses.fields(cls)])
+    return out
+
+
+def rebuild(obj: Any, make: Callable[[type, list], Any], new_money: Callable[[Money], Any]) -> Any:
+    if isinstance(obj, Money):
+        return new_money(obj)
+    if isinstance(obj, list):
+        return [rebuild(v, make, new_money) for v in obj]
+    if dataclasses.is_dataclass(obj):
+        return make(type(obj), [rebuild(getattr(obj, f.name), make, new_money) for f in dataclasses.fields(obj)])
+    return obj
+
+
+def traced(build: Callable[[], Any]):
+    """(result, bytes still allocated by build once it returns, seconds)."""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - t0
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--source", type=Path, default=DEFAULT_SOURCE)
+    ap.add_argument("--services", type=int, default=500_000)
+    ap.add_argument("--per-statement", type=int, default=50)
+    ap.add_argument("--min-reduction", type=float, default=0.3, help="required saving as a fraction (default 0.3)")
+    args = ap.parse_args()
+
+    text = synthetic_text(args.source.read_text(encoding="utf-8"), args.per_statement)
+    times = max(1, math.ceil(args.services / args.per_statement))
+
+    doc, parsed, elapsed = traced(lambda: parse_twist_multi(RepeatedStatements(text, times)))
+    statements = [st for es in doc.electronic_statement_list for st in es.statement_list]
+    services = sum(len(st.services) for st in statements)
+    print(f"source: {args.source}  statements: {len(statements)}  services: {services}")
+    print(f"parse_twist_multi: {parsed / 1e6:.1f} MB held, {parsed / services:.0f} B/service, {elapsed:.1f}s")
+
+    legacy = _legacy_classes()
+    _, slotted_bytes, _ = traced(lambda: rebuild(doc, lambda cls, vals: cls(*vals), lambda m: money(m.amount, m.currency_code)))
+    legacy_money = legacy[Money]
+    _, legacy_bytes, _ = traced(lambda: rebuild(doc, lambda cls, vals: legacy[cls](*vals), lambda m: legacy_money(m.amount, m.currency_code)))
+
+    print(f"{'object model':<30}{'MB':>10}{'B/service':>12}")
+    print(f"{'dict dataclasses, Money each':<30}{legacy_bytes / 1e6:>10.1f}{legacy_bytes / services:>12.0f}")
+    print(f"{'slotted, shared NO_MONEY':<30}{slotted_bytes / 1e6:>10.1f}{slotted_bytes / services:>12.0f}")
+    reduction = 1 - slotted_bytes / legacy_bytes
+    print(f"reduction: {reduction:.0%}")
+    if reduction < args.min_reduction:
+        print(f"\nregression: slotted model saves {reduction:.0%}, expected at least {args.min_reduction:.0%}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
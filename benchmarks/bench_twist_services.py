@@ -0,0 +1,129 @@
+"""
+Per-service extraction cost for TWIST service rows.
+
+Streams data/Sample_Parser.xml with its <electronicStatement> blocks repeated until the
+document holds --services <service> elements (1M by default; the file is generated on the
+fly, never written out). Every closed <statement> is extracted twice: with the old
+namespaced find() per field, and with twist_stream's one-walk child index. Rows are
+checked to be identical.
+
+    python benchmarks/bench_twist_services.py --services 1000000
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src import twist_stream
+from src.twist_parser_service import _txt
+from src.twist_stream import ACCOUNT_FIELDS, NS, SERVICE_FIELDS
+
+DEFAULT_SOURCE = Path(__file__).resolve().parents[1] / "data" / "Sample_Parser.xml"
+
+
+class RepeatedStatements:
+    """
+    Binary file-like object: the document with its electronicStatement blocks served `times` times.
+    """
+
+    def __init__(self, text: str, times: int):
+        start = text.index("<electronicStatement")
+        end = text.rindex("</electronicStatement>") + len("</electronicStatement>")
+        self._parts = [text[:start].encode("utf-8")]
+        self._body = text[start:end].encode("utf-8")
+        self._tail = text[end:].encode("utf-8")
+        self._left = times
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._parts:
+            if self._left > 0:
+                self._parts.append(self._body)
+                self._left -= 1
+            elif self._tail is not None:
+                self._parts.append(self._tail)
+                self._tail = None
+            else:
+                return b""
+        return self._parts.pop()
+
+
+def find_rows(stmt: ET.Element) -> List[Dict[str, Any]]:
+    """
+    The old extraction: a namespaced find() per field, serviceType looked up twice.
+    """
+    acc_el = stmt.find("t:account", NS)
+    context = {name: _txt(acc_el, path) for name, path in ACCOUNT_FIELDS}
+    rows = []
+    for svc_el in stmt.findall("t:service", NS):
+        if _txt(svc_el, "t:serviceType") is None:
+            continue
+        row = dict(context)
+        for name, path in SERVICE_FIELDS:
+            row[name] = _txt(svc_el, path)
+        rows.append(row)
+    return rows
+
+
+def iter_statements(source) -> Iterator[ET.Element]:
+    stmt_tag = f"{{{twist_stream.TWIST_NS}}}statement"
+    stack: List[ET.Element] = []
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+        stack.pop()
+        if len(stack) == 2 and elem.tag == stmt_tag:
+            yield elem
+            elem.clear()
+            stack[1].remove(elem)
+        elif len(stack) == 1:
+            elem.clear()
+            stack[0].remove(elem)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--source", type=Path, default=DEFAULT_SOURCE)
+    ap.add_argument("--services", type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    text = args.source.read_text(encoding="utf-8")
+    per_copy = len(ET.fromstring(text).findall("t:electronicStatement/t:statement/t:service", NS))
+    times = max(1, math.ceil(args.services / max(per_copy, 1)))
+
+    services = rows = 0
+    find_ns = index_ns = 0
+    t0 = time.perf_counter()
+    for stmt in iter_statements(RepeatedStatements(text, times)):
+        services += len(stmt.findall("t:service", NS))
+
+        t = time.perf_counter_ns()
+        old = find_rows(stmt)
+        find_ns += time.perf_counter_ns() - t
+
+        t = time.perf_counter_ns()
+        new = list(twist_stream._statement_rows(stmt, SERVICE_FIELDS, {}))
+        index_ns += time.perf_counter_ns() - t
+
+        if old != new:
+            raise SystemExit(f"row mismatch in statement {services}")
+        rows += len(new)
+    elapsed = time.perf_counter() - t0
+
+    n = services or 1
+    print(f"source: {args.source} x{times}  services: {services}  rows: {rows}  ({elapsed:.1f}s)")
+    print(f"{'extraction':<22}{'ns/service':>12}{'total s':>10}")
+    print(f"{'find() per field':<22}{find_ns / n:>12.0f}{find_ns / 1e9:>10.2f}")
+    print(f"{'child index':<22}{index_ns / n:>12.0f}{index_ns / 1e9:>10.2f}")
+    print(f"speedup: {find_ns / max(index_ns, 1):.2f}x")
+
+
+if __name__ == "__main__":
+    main()
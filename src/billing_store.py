@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import json
+import os
+import tempfile
+import uuid
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# columns shared by list_account_services and parse_twist rows; everything else is dropped
+CORE_COLUMNS = (
+    "account_id",
+    "from_dt",
+    "to_dt",
+    "invoice_dt",
+    "currency",
+    "service_code",
+    "charge_amount",
+    "volume",
+    "source_file_type",
+)
+DATE_COLUMNS = ("from_dt", "to_dt", "invoice_dt")
+DEFAULT_ROW_GROUP_SIZE = 4096
+UNKNOWN_MONTH = "unknown"
+_INDEX = "index.json"
+_INDEX_VERSION = 1
+
+
+def parse_date(value: Optional[str]) -> Optional[dt.date]:
+    """822 dates are CCYYMMDD, TWIST dates YYYY-MM-DD; anything else is None."""
+    if not value:
+        return None
+    digits = value.strip().replace("-", "")
+    if len(digits) != 8 or not digits.isdigit():
+        return None
+    try:
+        return dt.date(int(digits[:4]), int(digits[4:6]), int(digits[6:]))
+    except ValueError:
+        return None
+
+
+def month_of(day: Optional[dt.date]) -> str:
+    return f"{day.year:04d}-{day.month:02d}" if day is not None else UNKNOWN_MONTH
+
+
+def months_back(until: dt.date, months: int) -> str:
+    """The first month of the `months` months ending with until's month, as YYYY-MM."""
+    n = until.year * 12 + until.month - 1 - (months - 1)
+    return f"{n // 12:04d}-{n % 12 + 1:02d}"
+
+
+def _safe(value: str) -> str:
+    # partition directory names: keep them readable, never a path separator
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in value) or "_"
+
+
+class BillingStore:
+    """
+    Local columnar store of billing rows: Parquet files partitioned as
+    source=<source_file_type>/month=<invoice month>/part-<batch>.parquet, with an index.json
+    listing every file and, per row group, the smallest and largest account_id in it.
+
+    Each file is sorted by account_id, so an account's rows sit in a contiguous run of row
+    groups; a query picks the files of the wanted months and sources from the index, finds
+    the row groups by bisecting their account ranges and reads only those. Nothing else is
+    opened, so a query costs the same whatever the years of history around it.
+
+    Dates are stored as dates (822 CCYYMMDD and TWIST YYYY-MM-DD alike), the other columns as
+    the parsers' strings. Rows without a readable invoice date fall back to to_dt, then
+    from_dt, then the "unknown" month. One writer at a time; readers see the previous index
+    until a write completes.
+    """
+
+    def __init__(self, directory: Union[str, Path], row_group_size: int = DEFAULT_ROW_GROUP_SIZE):
+        # Requires: pip install pyarrow
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        if row_group_size < 1:
+            raise ValueError("row_group_size must be >= 1")
+        self._pa, self._pc, self._pq = pa, pc, pq
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.row_group_size = row_group_size
+        self.schema = pa.schema(
+            [pa.field(c, pa.date32() if c in DATE_COLUMNS else pa.string()) for c in CORE_COLUMNS]
+        )
+        self._files: List[Dict[str, Any]] = []
+        self._index_stamp: Optional[Tuple[int, int]] = None
+
+    # ---- index ----
+    @property
+    def files(self) -> List[Dict[str, Any]]:
+        """Index entries: path (relative), source, month, batch, rows, groups [[min, max], ...]."""
+        self._load_index()
+        return self._files
+
+    def _load_index(self) -> None:
+        path = self.directory / _INDEX
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self._files, self._index_stamp = [], None
+            return
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp == self._index_stamp:
+            return
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("version") != _INDEX_VERSION:
+            raise ValueError(f"{path}: unsupported index version {data.get('version')}")
+        self._files, self._index_stamp = data["files"], stamp
+
+    def _write(self, target: Path, write) -> None:
+        # temp file + rename, as ParseCache does: readers see the old file or the whole new one
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            write(tmp)
+            os.replace(tmp, target)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    def _save_index(self, files: List[Dict[str, Any]]) -> None:
+        body = json.dumps({"version": _INDEX_VERSION, "files": files}, separators=(",", ":"))
+        self._write(self.directory / _INDEX, lambda tmp: Path(tmp).write_text(body, encoding="utf-8"))
+        self._index_stamp = None
+        self._load_index()
+
+    # ---- writing ----
+    def add(self, rows: Iterable[Dict[str, Any]], batch: Optional[str] = None) -> int:
+        """
+        Stores rows (list_account_services / parse_twist / iter_bundle_rows dicts) and returns
+        how many were stored. `batch` names the input, e.g. its file digest: adding a batch
+        that is already stored replaces its rows, so re-loading a file does not duplicate it.
+        """
+        partitions: Dict[Tuple[str, str], Dict[str, list]] = {}
+        for row in rows:
+            values = [row.get(c) for c in CORE_COLUMNS]
+            dates = {c: parse_date(row.get(c)) for c in DATE_COLUMNS}
+            day = dates["invoice_dt"] or dates["to_dt"] or dates["from_dt"]
+            key = (row.get("source_file_type") or "unknown", month_of(day))
+            columns = partitions.get(key)
+            if columns is None:
+                columns = partitions[key] = {c: [] for c in CORE_COLUMNS}
+            for c, v in zip(CORE_COLUMNS, values):
+                columns[c].append(dates[c] if c in dates else v)
+
+        stem = hashlib.blake2b(batch.encode("utf-8"), digest_size=10).hexdigest() if batch else uuid.uuid4().hex[:20]
+        entries = []
+        for (source, month), columns in sorted(partitions.items()):
+            entries.append(self._write_partition(source, month, stem, batch, columns))
+
+        old = self.files
+        kept = [f for f in old if batch is None or f["batch"] != batch]
+        written = {e["path"] for e in entries}
+        self._save_index(kept + entries)
+        # files of the replaced batch that this load did not overwrite
+        for f in old:
+            if batch is not None and f["batch"] == batch and f["path"] not in written:
+                try:
+                    (self.directory / f["path"]).unlink()
+                except OSError:
+                    pass
+        return sum(e["rows"] for e in entries)
+
+    def _write_partition(self, source: str, month: str, stem: str, batch: Optional[str], columns) -> Dict[str, Any]:
+        pa, pc = self._pa, self._pc
+        table = pa.Table.from_pydict(columns, schema=self.schema)
+        table = table.take(pc.array_sort_indices(table.column("account_id"), null_placement="at_start"))
+        ids = table.column("account_id").to_pylist()
+        step = self.row_group_size
+        groups = [[ids[i] or "", ids[min(i + step, len(ids)) - 1] or ""] for i in range(0, len(ids), step)]
+
+        rel = f"source={_safe(source)}/month={_safe(month)}/part-{stem}.parquet"
+        self._write(self.directory / rel, lambda tmp: self._pq.write_table(table, tmp, row_group_size=step))
+        return {"path": rel, "source": source, "month": month, "batch": batch, "rows": len(ids), "groups": groups}
+
+    # ---- queries ----
+    def query(
+        self,
+        account_id: str,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        sources: Optional[Sequence[str]] = None,
+    ):
+        """
+        pyarrow Table of every stored row for `account_id` with invoice month in
+        [since, until] (YYYY-MM, inclusive; None = open), optionally only from `sources`
+        (source_file_type values). Rows come in (month, source) order.
+        """
+        pa, pc, pq = self._pa, self._pc, self._pq
+        tables = []
+        for f in sorted(self.files, key=lambda f: (f["month"], f["source"])):
+            month = f["month"]
+            if since is not None and (month == UNKNOWN_MONTH or month < since):
+                continue
+            if until is not None and (month == UNKNOWN_MONTH or month > until):
+                continue
+            if sources is not None and f["source"] not in sources:
+                continue
+            wanted = _groups_for(f["groups"], account_id)
+            if not wanted:
+                continue
+            table = pq.ParquetFile(self.directory / f["path"]).read_row_groups(wanted, columns=list(CORE_COLUMNS))
+            tables.append(table.filter(pc.equal(table.column("account_id"), account_id)))
+        if not tables:
+            return self.schema.empty_table()
+        return pa.concat_tables(tables)
+
+    def account_charges(
+        self,
+        account_id: str,
+        months: int = 12,
+        until: Optional[dt.date] = None,
+        sources: Optional[Sequence[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """All charges for `account_id` invoiced in the last `months` months up to `until` (default today)."""
+        if months < 1:
+            raise ValueError("months must be >= 1")
+        until = until or dt.date.today()
+        return self.query(account_id, months_back(until, months), month_of(until), sources).to_pylist()
+
+
+def _groups_for(groups: List[List[str]], account_id: str) -> List[int]:
+    # groups are sorted by account_id, so the matches are one run starting at the first max >= id
+    i = bisect_left(groups, account_id, key=lambda g: g[1])
+    out = []
+    while i < len(groups) and groups[i][0] <= account_id:
+        out.append(i)
+        i += 1
+    return out
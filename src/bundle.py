@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import bz2
+import gzip
+import io
+import lzma
+import os
+import tarfile
+import zipfile
+from functools import partial
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Union
+
+from src.twist_stream import iter_service_rows
+from src.x12_822 import extract_822, service_rows
+from src.x12_envelope import validate_interchange
+from src.x12_parallel import parallel_map_ordered
+from src.x12_tokenizer import iter_interchange_segments
+
+# member formats, as sniffed from the first bytes
+EDI = "822"
+TWIST = "twist"
+
+_SNIFF_BYTES = 4096
+_TAR_PEEK = 512
+
+# leading bytes -> container; anything else is read as a plain file
+_MAGIC = (
+    (b"PK\x03\x04", "zip"),
+    (b"PK\x05\x06", "zip"),  # empty zip
+    (b"\x1f\x8b", "gz"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+)
+_OPENERS = {"gz": gzip.open, "bz2": bz2.open, "xz": lzma.open, "plain": open}
+_SUFFIXES = {"gz": (".gz", ".gzip"), "bz2": (".bz2",), "xz": (".xz",)}
+
+
+class BundleMember(NamedTuple):
+    archive: str
+    name: str
+    container: str  # "zip", "gz", "bz2", "xz", "plain" or "tar"
+    data: Optional[bytes] = None  # tar members only: a tar stream cannot be reopened at a member
+
+
+def _container(path: str) -> str:
+    with open(path, "rb") as f:
+        head = f.read(8)
+    for magic, container in _MAGIC:
+        if head.startswith(magic):
+            return container
+    return "plain"
+
+
+def _is_tar(head: bytes) -> bool:
+    return len(head) >= 262 and head[257:262] == b"ustar"
+
+
+def _single_name(path: str, container: str) -> str:
+    name = os.path.basename(path)
+    for suffix in _SUFFIXES.get(container, ()):
+        if name.lower().endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def iter_bundle_members(path: Union[str, Path]) -> Iterator[BundleMember]:
+    """
+    The files inside a bundle, in archive order, without extracting anything to disk: zip
+    members, the entries of a (compressed) tar, or the single file of a .gz/.bz2/.xz or
+    uncompressed file. The container is recognised by its magic bytes, not its suffix.
+    """
+    path = os.fspath(path)
+    container = _container(path)
+    if container == "zip":
+        with zipfile.ZipFile(path) as zf:
+            for info in zf.infolist():
+                if not info.is_dir():
+                    yield BundleMember(path, info.filename, "zip")
+        return
+
+    with _OPENERS[container](path, "rb") as f:
+        head = f.read(_TAR_PEEK)
+    if not _is_tar(head):
+        yield BundleMember(path, _single_name(path, container), container)
+        return
+    # tar (possibly compressed): one sequential pass, each member read as it goes by
+    with tarfile.open(path, mode="r|*") as tf:
+        for info in tf:
+            if info.isfile():
+                yield BundleMember(path, info.name, "tar", tf.extractfile(info).read())
+
+
+def open_member(member: BundleMember) -> BinaryIO:
+    """A binary stream over the member's bytes, decompressed as they are read."""
+    if member.data is not None:
+        return io.BytesIO(member.data)
+    if member.container == "zip":
+        zf = zipfile.ZipFile(member.archive)
+        try:
+            stream = zf.open(member.name)
+        except BaseException:
+            zf.close()
+            raise
+        # the ZipFile stays open until the member stream is closed
+        zf.close()
+        return stream
+    return _OPENERS[member.container](member.archive, "rb")
+
+
+def sniff_format(head: bytes) -> Optional[str]:
+    """EDI for an X12 interchange ("ISA"), TWIST for XML, None for anything else."""
+    if head[:2] in (b"\xff\xfe", b"\xfe\xff"):
+        head = head.decode("utf-16", errors="ignore").encode("utf-8")
+    head = head.lstrip(b"\xef\xbb\xbf").lstrip()
+    if head[:3] == b"ISA":
+        return EDI
+    if head[:1] == b"<":
+        return TWIST
+    return None
+
+
+def member_format(member: BundleMember) -> Optional[str]:
+    with open_member(member) as f:
+        return sniff_format(f.read(_SNIFF_BYTES))
+
+
+def _edi_rows(stream: BinaryIO, encoding: str) -> Iterator[Dict[str, Any]]:
+    # the parse_edi(engine="native") path, reading the member as it decompresses
+    text = io.TextIOWrapper(stream, encoding=encoding, newline="")
+    for segments in iter_interchange_segments(text, raw="drop"):
+        ic = extract_822(validate_interchange(segments))
+        for tx in ic.transactions_822:
+            for account in tx.accounts:
+                yield from service_rows(ic, account)
+
+
+def member_rows(
+    member: BundleMember,
+    backend: str = "auto",
+    encoding: str = "utf-8",
+) -> List[Dict[str, Any]]:
+    """
+    The rows of one member, as parse_edi(engine="native") or parse_twist would return them,
+    each with a trailing "member" column holding the member name. Members that are neither
+    X12 nor XML give no rows.
+    """
+    fmt = member_format(member)
+    if fmt is None:
+        return []
+    with open_member(member) as stream:
+        if fmt == EDI:
+            rows = _edi_rows(stream, encoding)
+        else:
+            rows = iter_service_rows(stream, extra={"source_file_type": "TWIST"}, backend=backend)
+        out = []
+        for row in rows:
+            row["member"] = member.name
+            out.append(row)
+    return out
+
+
+def iter_bundle_rows(
+    path: Union[str, Path],
+    workers: Optional[int] = None,
+    chunksize: int = 1,
+    backend: str = "auto",
+    encoding: str = "utf-8",
+) -> Iterator[Dict[str, Any]]:
+    """
+    One row stream over every 822 and TWIST file in a bundle (zip, tar, .gz/.bz2/.xz), each row
+    tagged with its member name. Members are parsed in a process pool of `workers` (None = one
+    per CPU), `chunksize` members per task, and their rows come back in archive order.
+
+    Zip and single-file members are opened and decompressed by the worker itself, so only the
+    member name crosses the process boundary; tar members are read once here and sent as bytes.
+    """
+    members = iter_bundle_members(path)
+    parse = partial(member_rows, backend=backend, encoding=encoding)
+    for rows in parallel_map_ordered(parse, members, workers=workers, chunksize=chunksize):
+        yield from rows
@@ -2,12 +2,27 @@ from __future__ import annotations
 
 import asyncio
 import gzip
-from dataclasses import dataclass, field, asdict
+import io
+from dataclasses import asdict
+from functools import partial
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 from x12_edi_tools.x12_parser import X12Parser, X12ParserError
 
+from src.x12_822 import (
+    Account,
+    Balance,
+    EDI822Document,
+    Interchange,
+    ServiceCharge,
+    Transaction822,
+    extract_822,
+)
+from src.x12_envelope import validate_interchange
+from src.x12_parallel import parallel_map_ordered
+from src.x12_tokenizer import Segment, iter_interchange_segments, iter_interchange_texts, iter_segments
+
 
 class OrderedX12Parser(X12Parser):
     """
@@ -22,65 +37,6 @@ class OrderedX12Parser(X12Parser):
         return segments, dict(self.parsed_data)
 
 
-# -----------------------
-# Data Model
-# -----------------------
-@dataclass
-class Balance:
-    balance_type: Optional[str] = None
-    balance_code: Optional[str] = None
-    amount: Optional[str] = None
-    raw: Optional[str] = None
-
-
-@dataclass
-class ServiceCharge:
-    service_class: Optional[str] = None
-    service_code: Optional[str] = None
-    volume: Optional[str] = None
-    charge_amount: Optional[str] = None
-    rate: Optional[str] = None
-    unit: Optional[str] = None
-    description: Optional[str] = None
-    raw: Optional[str] = None
-
-
-@dataclass
-class Account:
-    account_id: Optional[str] = None
-    account_desc: Optional[str] = None
-    currency: Optional[str] = None
-    ent: Optional[List[str]] = None
-    account_parent: Optional[str] = None
-    rates: Optional[str] = None
-    parties: List[Dict[str, Any]] = field(default_factory=list)
-    balances: List[Balance] = field(default_factory=list)
-    service_charges: List[ServiceCharge] = field(default_factory=list)
-
-
-@dataclass
-class Transaction822:
-    control_number: Optional[str] = None
-    bgn: Optional[List[str]] = None
-    dtm: List[List[str]] = field(default_factory=list)
-    accounts: List[Account] = field(default_factory=list)
-
-
-@dataclass
-class Interchange:
-    isa: Optional[List[str]] = None
-    gs: Optional[List[str]] = None
-    transactions_822: List[Transaction822] = field(default_factory=list)
-    invoice_date: Optional[str] = None
-    from_date: Optional[str] = None
-    to_date: Optional[str] = None
-
-
-@dataclass
-class EDI822Document:
-    interchanges: List[Interchange] = field(default_factory=list)
-
-
 # -----------------------
 # Separator detection
 # -----------------------
@@ -158,11 +114,15 @@ def _normalize_isa_newlines(interchange: str, seg_term: str) -> str:
     term = interchange.find(seg_term, i)
     if term == -1:
         return interchange
-    isa = interchange[i:term + 1].replace("\r", "").replace("\n", "")
+    isa = interchange[i:term + 1]
+    if "\n" not in isa and "\r" not in isa:
+        # already flat (fixed-record files are unwrapped by the tokenizer)
+        return interchange
+    isa = isa.replace("\r", "").replace("\n", "")
     return interchange[:i] + isa + interchange[term + 1:]
 
 
-def parse_segments_from_interchange(interchange: str) -> List[Dict[str, Any]]:
+def parse_segments_from_interchange(interchange: str) -> List[Segment]:
     isa_pos = interchange.find("ISA")
     if isa_pos == -1:
         raise ValueError("No ISA found in interchange")
@@ -170,40 +130,16 @@ def parse_segments_from_interchange(interchange: str) -> List[Dict[str, Any]]:
     element_sep, _, seg_term = detect_separators_from_isa(interchange, isa_pos)
     interchange = _normalize_isa_newlines(interchange, seg_term)
 
-    segments: List[Dict[str, Any]] = []
+    segments: List[Segment] = []
     for raw_seg in interchange.split(seg_term):
         raw_seg = raw_seg.strip()
         if not raw_seg:
             continue
         parts = raw_seg.split(element_sep)
-        segments.append({"tag": parts[0].strip(), "elements": parts[1:], "raw": raw_seg})
+        segments.append(Segment(parts[0].strip(), tuple(parts[1:]), raw_seg))
     return segments
 
 
-# -----------------------
-# 822 extraction
-# -----------------------
-def _parse_ser(elements: List[str], raw: str) -> ServiceCharge:
-    # Parsing the SER segment
-    sc = ServiceCharge(raw=raw)
-    sc.service_class = elements[0] if len(elements) > 0 else None
-    sc.service_code = elements[1] if len(elements) > 1 else None
-    sc.charge_amount = elements[2] if len(elements) > 2 else None
-    sc.volume = elements[3] if len(elements) > 3 else None
-    sc.unit = elements[4] if len(elements) > 4 else None
-    sc.description = elements[6] if len(elements) > 6 else None
-    return sc
-
-
-def _parse_bln(elements: List[str], raw: str) -> Balance:
-    # Parsing the BLN segment
-    b = Balance(raw=raw)
-    b.balance_type = elements[0] if len(elements) > 0 else None
-    b.balance_code = elements[1] if len(elements) > 1 else None
-    b.amount = elements[-1] if len(elements) > 0 else None
-    return b
-
-
 def normalize_for_x12_edi_tools(interchange: str) -> str:
     """
     x12-edi-tools expects standard separators in practice (~ and *).
@@ -230,134 +166,6 @@ def normalize_for_x12_edi_tools(interchange: str) -> str:
     return interchange.strip()
 
 
-def extract_822(segments: List[Dict[str, Any]]) -> Interchange:
-    ic = Interchange()
-
-    current_tx: Optional[Transaction822] = None
-    current_ent: Optional[List[str]] = None
-    current_account: Optional[Account] = None
-
-    header_parties: List[Dict[str, Any]] = []
-    ent_parties: List[Dict[str, Any]] = []
-
-    def new_account_from_act(el: List[str]) -> Account:
-        a = Account(
-            ent=current_ent,
-            account_id=(el[0] if len(el) > 0 else None),
-            account_desc=(el[1] if len(el) > 1 else None),
-            account_parent=(el[5] if len(el) > 5 else None),
-        )
-        # inherit parties collected so far (BK/AO etc.)
-        a.parties.extend(header_parties)
-        a.parties.extend(ent_parties)
-        return a
-
-    for seg in segments:
-        tag = seg["tag"]
-        el = seg["elements"]
-
-        if tag == "ISA":
-            ic.isa = el
-
-        elif tag == "GS":
-            ic.gs = el
-
-        elif tag == "ST":
-            if len(el) > 0 and el[0] == "822":
-                current_tx = Transaction822(control_number=(el[1] if len(el) > 1 else None))
-                ic.transactions_822.append(current_tx)
-
-                current_ent = None
-                current_account = None
-                header_parties = []
-                ent_parties = []
-            else:
-                current_tx = None
-                current_ent = None
-                current_account = None
-
-        elif current_tx is not None:
-            if tag == "BGN":
-                current_tx.bgn = el
-
-            elif tag == "DTM":
-                current_tx.dtm.append(el)
-
-                if len(el) > 1:
-                    qual = el[0]
-                    date = el[1]
-
-                if qual == "009":
-                    ic.invoice_date = date
-                elif qual == "150":
-                    ic.from_date = date
-                elif qual == "151":
-                    ic.to_date = date
-
-
-            elif tag == "N1":
-                party = {
-                    "entity_id_code": el[0] if len(el) > 0 else None,
-                    "name": el[1] if len(el) > 1 else None,
-                    "id_code_qual": el[2] if len(el) > 2 else None,
-                    "id_code": el[3] if len(el) > 3 else None,
-                    "raw": seg["raw"],
-                }
-                # before ENT -> header, after ENT (before/after ACT) -> ent_parties
-                if current_ent is None:
-                    header_parties.append(party)
-                else:
-                    ent_parties.append(party)
-                    # also attach to current account if one is active
-                    if current_account is not None:
-                        current_account.parties.append(party)
-
-            elif tag == "ENT":
-                current_ent = el
-                ent_parties = []
-                current_account = None  # next ACT starts a new account
-
-            elif tag == "ACT":
-                current_account = new_account_from_act(el)
-                current_tx.accounts.append(current_account)
-
-            elif tag == "CUR":
-                if current_account is None:
-                    # create placeholder account if CUR arrives before ACT
-                    current_account = Account(ent=current_ent)
-                    current_account.parties.extend(header_parties)
-                    current_account.parties.extend(ent_parties)
-                    current_tx.accounts.append(current_account)
-                current_account.currency = el[1] if len(el) > 1 else current_account.currency
-
-            elif tag == "RTE":
-                if current_account is None:
-                    # create placeholder account if RTE arrives before ACT
-                    current_account = Account(ent=current_ent)
-                    current_account.parties.extend(header_parties)
-                    current_account.parties.extend(ent_parties)
-                    current_tx.accounts.append(current_account)
-                current_account.rates = el[1] if len(el) > 1 else None
-
-            elif tag == "BLN":
-                if current_account is None:
-                    current_account = Account(ent=current_ent)
-                    current_account.parties.extend(header_parties)
-                    current_account.parties.extend(ent_parties)
-                    current_tx.accounts.append(current_account)
-                current_account.balances.append(_parse_bln(el, seg["raw"]))
-
-            elif tag == "SER":
-                if current_account is None:
-                    current_account = Account(ent=current_ent)
-                    current_account.parties.extend(header_parties)
-                    current_account.parties.extend(ent_parties)
-                    current_tx.accounts.append(current_account)
-                current_account.service_charges.append(_parse_ser(el, seg["raw"]))
-
-    return ic
-
-
 def list_account_services(doc) -> List[Dict[str, Any]]:
     rows: List[Dict[str, Any]] = []
     # Convert the EDIX12Doc to List of Dict
@@ -382,27 +190,63 @@ def list_account_services(doc) -> List[Dict[str, Any]]:
     return rows
 
 
-def parse_edi(raw_text) -> List[Dict[str, Any]]:
-    rows: List[Dict[str, Any]] = []
+def parse_interchange(interchange_text: str, engine: str = "x12-edi-tools") -> Interchange:
+    """
+    Parses one ISA…IEA block. Kept at module level so process-pool workers can pickle it.
+    """
+    if engine == "native":
+        segments = iter_segments(io.StringIO(interchange_text))
+        return extract_822(validate_interchange(segments))
+
+    normalized = normalize_for_x12_edi_tools(interchange_text)
+
+    # x12-edi-tools parse + validation
+    parser = OrderedX12Parser()
+    try:
+        seg_strings, _ = parser.parse_with_order(normalized)
+    except X12ParserError as e:
+        raise ValueError(f"x12-edi-tools could not parse interchange: {e}") from e
+
+    # Build ordered segments for  822 mapper
+    ordered_segments: List[Segment] = []
+    for s in seg_strings:
+        parts = s.split("*")
+        ordered_segments.append(Segment(parts[0].strip(), tuple(parts[1:]), s))
+
+    return extract_822(ordered_segments)
+
+
+def parse_edi(
+    raw_text,
+    engine: str = "x12-edi-tools",
+    workers: Optional[int] = 1,
+    chunksize: int = 1,
+) -> List[Dict[str, Any]]:
+    """
+    engine="native" tokenizes once with the file's own separators and checks the
+    ISA/GS/ST envelopes inline, skipping the normalize + x12-edi-tools round trip.
+
+    workers > 1 (None = one per CPU) parses interchanges in a process pool, `chunksize`
+    interchanges per task. Interchanges stay in document order.
+    """
+    if engine not in ("x12-edi-tools", "native"):
+        raise ValueError(f"Unknown EDI engine: {engine}")
 
     doc = EDI822Document()
-    for interchange_text in split_interchanges(raw_text.read()):
-        normalized = normalize_for_x12_edi_tools(interchange_text)
-
-        # x12-edi-tools parse + validation
-        parser = OrderedX12Parser()
-        try:
-            seg_strings, _ = parser.parse_with_order(normalized)
-        except X12ParserError as e:
-            raise ValueError(f"x12-edi-tools could not parse interchange: {e}") from e
-
-        # Build ordered segments for  822 mapper
-        ordered_segments: List[Dict[str, Any]] = []
-        for s in seg_strings:
-            parts = s.split("*")
-            ordered_segments.append({"tag": parts[0].strip(), "elements": parts[1:], "raw": s})
-
-        doc.interchanges.append(extract_822(ordered_segments))
-        # Convert the EDI822Document into list of accounts and services
-        rows = list_account_services(doc)
-    return rows
+    if workers != 1:
+        doc.interchanges.extend(parallel_map_ordered(
+            partial(parse_interchange, engine=engine),
+            iter_interchange_texts(raw_text),
+            workers=workers,
+            chunksize=chunksize,
+        ))
+    elif engine == "native":
+        for segments in iter_interchange_segments(raw_text):
+            doc.interchanges.append(extract_822(validate_interchange(segments)))
+    else:
+        # interchanges are read one at a time from the handle, never the whole file
+        for interchange_text in iter_interchange_texts(raw_text):
+            doc.interchanges.append(parse_interchange(interchange_text))
+
+    # Convert the EDI822Document into list of accounts and services
+    return list_account_services(doc)
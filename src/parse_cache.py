@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import struct
+import tempfile
+import time
+import zlib
+from array import array
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+_MAGIC = b"PRC1"
+_SUFFIX = ".rows"
+# a temp file this old belongs to a writer that died; eviction removes it
+_STALE_TMP_SECONDS = 3600
+
+
+def file_digest(path: Union[str, Path]) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _source_file(source) -> Optional[str]:
+    if isinstance(source, os.PathLike):
+        return os.fspath(source)
+    if isinstance(source, str):
+        # the TWIST parsers take a path, the EDI parsers the text itself
+        if "\n" not in source and len(source) < 4096 and os.path.isfile(source):
+            return source
+        return None
+    name = getattr(source, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return name
+    return None
+
+
+def content_digest(source, file_digest: Callable[[str], str] = file_digest) -> Optional[str]:
+    """
+    Digest of what a parser would read: a path or a file opened from one is hashed from disk,
+    str/bytes content directly. None when the source cannot be hashed (e.g. a pipe).
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.blake2b(bytes(source), digest_size=20).hexdigest()
+    path = _source_file(source)
+    if path is not None:
+        return file_digest(path)
+    if isinstance(source, str):
+        return hashlib.blake2b(source.encode("utf-8"), digest_size=20).hexdigest()
+    return None
+
+
+def source_version(*paths: Union[str, Path]) -> str:
+    """Digest of the parser's own source files, so cached rows go stale when the code changes."""
+    h = hashlib.blake2b(digest_size=10)
+    for path in paths:
+        h.update(Path(path).read_bytes())
+    return h.hexdigest()
+
+
+# ---- binary columnar row encoding ----
+def encode_rows(rows: List[Dict[str, Any]]) -> Optional[bytes]:
+    """
+    Column-wise encoding of a list of dicts sharing one key order: str/None columns are
+    dictionary-encoded (distinct strings once, then one small int code per row, 0 = None),
+    any other column is stored as JSON. Returns None when the rows do not share their keys.
+    """
+    names = list(rows[0]) if rows else []
+    for row in rows:
+        if len(row) != len(names) or list(row) != names:
+            return None
+
+    meta: List[Dict[str, Any]] = []
+    body = io.BytesIO()
+    for name in names:
+        values = [row[name] for row in rows]
+        if all(v is None or type(v) is str for v in values):
+            table: Dict[str, int] = {}
+            codes = [0 if v is None else table.setdefault(v, len(table) + 1) for v in values]
+            typecode = "B" if len(table) < 0xFF else "H" if len(table) < 0xFFFF else "I"
+            strings = [s.encode("utf-8") for s in table]
+            parts = (array("I", map(len, strings)).tobytes(), b"".join(strings), array(typecode, codes).tobytes())
+            meta.append({"name": name, "kind": "dict", "typecode": typecode, "sizes": [len(p) for p in parts]})
+        else:
+            parts = (json.dumps(values).encode("utf-8"),)
+            meta.append({"name": name, "kind": "json", "sizes": [len(parts[0])]})
+        for part in parts:
+            body.write(part)
+
+    header = json.dumps({"rows": len(rows), "columns": meta}).encode("utf-8")
+    return struct.pack("<I", len(header)) + header + body.getvalue()
+
+
+def decode_rows(blob: bytes) -> List[Dict[str, Any]]:
+    (header_len,) = struct.unpack_from("<I", blob)
+    header = json.loads(blob[4:4 + header_len])
+    view = memoryview(blob)
+    pos = 4 + header_len
+    names, columns = [], []
+    for col in header["columns"]:
+        parts = []
+        for size in col["sizes"]:
+            parts.append(view[pos:pos + size])
+            pos += size
+        names.append(col["name"])
+        if col["kind"] == "json":
+            columns.append(json.loads(bytes(parts[0])))
+            continue
+        lengths = array("I")
+        lengths.frombytes(parts[0])
+        raw = bytes(parts[1])
+        table: List[Optional[str]] = [None]
+        offset = 0
+        for n in lengths:
+            table.append(raw[offset:offset + n].decode("utf-8"))
+            offset += n
+        codes = array(col["typecode"])
+        codes.frombytes(parts[2])
+        columns.append([table[c] for c in codes])
+    if not names:
+        return [{} for _ in range(header["rows"])]
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+
+class ParseCache:
+    """
+    On-disk cache of parsed rows, one file per key under `directory`.
+
+    Keys combine the content digest of the input, the parser name, its version and the
+    profile (the options that change its output). Entries are written to a temp file and
+    renamed into place, so concurrent readers only ever see complete files, and several
+    processes can share a directory. A hit bumps the entry's mtime; after every store the
+    least recently used entries are removed until the directory fits in `max_bytes`.
+
+    File digests are remembered under digests/ by (path, size, mtime, inode), so a rerun over
+    an unchanged file does not hash it again.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int = 512 * 1024 * 1024, level: int = 1):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.level = level
+
+    @staticmethod
+    def key(digest: str, parser: str, version: str, profile: Optional[Dict[str, Any]] = None) -> str:
+        ident = json.dumps([digest, parser, version, profile or {}], sort_keys=True)
+        return hashlib.blake2b(ident.encode("utf-8"), digest_size=20).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{_SUFFIX}"
+
+    def file_digest(self, path: str) -> str:
+        st = os.stat(path)
+        ident = f"{os.path.realpath(path)}\0{st.st_size}\0{st.st_mtime_ns}\0{st.st_ino}"
+        memo = self.directory / "digests" / hashlib.blake2b(ident.encode("utf-8"), digest_size=16).hexdigest()
+        try:
+            digest = memo.read_text(encoding="ascii")
+            if len(digest) == 40:
+                return digest
+        except (FileNotFoundError, UnicodeDecodeError):
+            pass
+        digest = file_digest(path)
+        memo.parent.mkdir(exist_ok=True)
+        self._write(memo, digest.encode("ascii"))
+        return digest
+
+    def _write(self, target: Path, data: bytes) -> None:
+        # temp file + rename: readers in other processes see the old file or the whole new one
+        fd, tmp = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, target)
+        except BaseException:
+            self._remove(Path(tmp))
+            raise
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            if data[:4] != _MAGIC or data[4:44].decode("ascii") != key:
+                raise ValueError("not an entry for this key")
+            rows = decode_rows(zlib.decompress(data[44:]))
+        except (ValueError, KeyError, struct.error, zlib.error, UnicodeDecodeError):
+            # truncated or foreign file: drop it and parse again
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass  # evicted meanwhile; the rows are already read
+        return rows
+
+    def put(self, key: str, rows: List[Dict[str, Any]]) -> bool:
+        """Stores rows under key; False if they cannot be encoded (rows with differing keys)."""
+        encoded = encode_rows(rows)
+        if encoded is None:
+            return False
+        self._write(self._path(key), _MAGIC + key.encode("ascii") + zlib.compress(encoded, self.level))
+        self.evict()
+        return True
+
+    def rows(
+        self,
+        source,
+        parser: str,
+        version: str,
+        profile: Optional[Dict[str, Any]],
+        parse: Callable[[], List[Dict[str, Any]]],
+    ) -> List[Dict[str, Any]]:
+        """Cached rows of `parser` over `source`, calling parse() and storing its rows on a miss."""
+        digest = content_digest(source, self.file_digest)
+        if digest is None:
+            return parse()
+        key = self.key(digest, parser, version, profile)
+        rows = self.get(key)
+        if rows is None:
+            rows = parse()
+            self.put(key, rows)
+        return rows
+
+    def evict(self) -> None:
+        entries: List[Tuple[float, int, Path]] = []
+        now = time.time()
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.name.endswith(_SUFFIX):
+                    entries.append((st.st_mtime, st.st_size, Path(entry.path)))
+                elif entry.name.endswith(".tmp") and now - st.st_mtime > _STALE_TMP_SECONDS:
+                    self._remove(Path(entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self) -> None:
+        for path in self.directory.glob(f"*{_SUFFIX}"):
+            self._remove(path)
+        for path in self.directory.glob("digests/*"):
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        try:
+            path.unlink()
+        except OSError:
+            # already gone, or still open by a reader on Windows; a later eviction retries
+            pass
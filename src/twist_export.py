@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Union
+
+# output suffix -> sink; every sink takes one row at a time, so nothing is held beyond a Parquet row group
+FORMATS = ("csv", "xlsx", "parquet")
+DEFAULT_ROW_GROUP_SIZE = 64_000
+
+
+class CsvSink:
+    """Writes each row straight to the file; None becomes an empty field."""
+
+    def __init__(self, path: Union[str, Path], columns: Sequence[str]):
+        self.columns = list(columns)
+        self._f = open(path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._f)
+        self._writer.writerow(self.columns)
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._writer.writerow(["" if (v := row.get(c)) is None else v for c in self.columns])
+
+    def close(self) -> None:
+        self._f.close()
+
+
+class XlsxSink:
+    """
+    openpyxl write_only workbook: rows are serialised to a temporary sheet file as they are
+    appended instead of being kept as cell objects, and the .xlsx is assembled on close().
+    """
+
+    def __init__(self, path: Union[str, Path], columns: Sequence[str], sheet_name: str = "Sheet1"):
+        # Requires: pip install openpyxl
+        from openpyxl import Workbook
+
+        self.columns = list(columns)
+        self.path = path
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet(sheet_name)
+        self._ws.append(self.columns)
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._ws.append([row.get(c) for c in self.columns])
+
+    def close(self) -> None:
+        self._wb.save(self.path)
+
+
+class ParquetSink:
+    """
+    Buffers `row_group_size` rows column-wise and writes each batch as one Parquet row group.
+    Column types come from the first batch; a column that is still all-None there is stored as string.
+    """
+
+    def __init__(self, path: Union[str, Path], columns: Sequence[str], row_group_size: int = DEFAULT_ROW_GROUP_SIZE):
+        # Requires: pip install pyarrow
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if row_group_size < 1:
+            raise ValueError("row_group_size must be >= 1")
+        self._pa, self._pq = pa, pq
+        self.columns = list(columns)
+        self.path = path
+        self.row_group_size = row_group_size
+        self._batch: Dict[str, List[Any]] = {c: [] for c in self.columns}
+        self._pending = 0
+        self._schema = None
+        self._writer = None
+
+    def write(self, row: Dict[str, Any]) -> None:
+        for c in self.columns:
+            self._batch[c].append(row.get(c))
+        self._pending += 1
+        if self._pending >= self.row_group_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        pa = self._pa
+        if self._schema is None:
+            inferred = pa.Table.from_pydict(self._batch).schema
+            self._schema = pa.schema(
+                [pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f for f in inferred]
+            )
+            self._writer = self._pq.ParquetWriter(self.path, self._schema)
+        self._writer.write_table(pa.Table.from_pydict(self._batch, schema=self._schema), row_group_size=self.row_group_size)
+        self._batch = {c: [] for c in self.columns}
+        self._pending = 0
+
+    def close(self) -> None:
+        if self._pending or self._writer is None:
+            self._flush()
+        self._writer.close()
+
+
+def open_sink(path: Union[str, Path], columns: Sequence[str], row_group_size: int = DEFAULT_ROW_GROUP_SIZE):
+    """A CsvSink / XlsxSink / ParquetSink chosen by the file suffix."""
+    fmt = Path(path).suffix.lower().lstrip(".")
+    if fmt == "csv":
+        return CsvSink(path, columns)
+    if fmt == "xlsx":
+        return XlsxSink(path, columns)
+    if fmt == "parquet":
+        return ParquetSink(path, columns, row_group_size)
+    raise ValueError(f"Unsupported export format: {path} (expected one of {', '.join(FORMATS)})")
+
+
+def export_rows(
+    rows: Iterable[Dict[str, Any]],
+    columns: Sequence[str],
+    paths: Iterable[Union[str, Path]],
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+) -> int:
+    """
+    Writes `rows` (dicts, typically a generator) to every path in one pass, in `columns` order;
+    keys outside `columns` are ignored. Returns the number of rows written.
+    """
+    sinks = []
+    try:
+        for path in paths:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            sinks.append(open_sink(path, columns, row_group_size))
+        n = 0
+        for row in rows:
+            for sink in sinks:
+                sink.write(row)
+            n += 1
+    except BaseException:
+        for sink in sinks:
+            try:
+                sink.close()
+            except Exception:
+                pass
+        raise
+    for sink in sinks:
+        sink.close()
+    return n
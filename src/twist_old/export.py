@@ -1,17 +1,25 @@
 from pathlib import Path
-import csv
-
-def export_csv_and_excel(doc, out_dir: str = "output"):
-    out_dir = Path(out_dir)
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    csv_path = out_dir / "twist_services.csv"
-    xlsx_path = out_dir / "twist_services.xlsx"
-
-    # --------- Flatten to rows (one row per service) ----------
-    rows = []
-    for es_idx, es in enumerate(doc.electronic_statements):
-        for st_idx, st in enumerate(es.statements):
+from typing import Any, Dict, Iterator, Sequence
+
+from src.twist_export import export_rows
+
+SERVICE_COLUMNS = [
+    "electronic_statement_index", "statement_index",
+    "account_id", "debit_account", "iban",
+    "statement_start_date", "statement_end_date",
+    "balance_currency", "settlement_currency", "host_currency",
+    "bankServiceID", "serviceDescription", "serviceType", "volume", "pricingCurrencyCode",
+    "unitPrice_amount", "unitPrice_currencyCode",
+    "originalChargeSettlement_amount", "originalChargeSettlement_currencyCode",
+]
+
+
+def iter_service_rows(doc) -> Iterator[Dict[str, Any]]:
+    """
+    One flat dict per service, yielded as it is built (SERVICE_COLUMNS keys).
+    """
+    for es_idx, es in enumerate(doc.electronic_statement_list):
+        for st_idx, st in enumerate(es.statement_list):
             acc = st.account
 
             account_id = ""
@@ -35,7 +43,7 @@ def export_csv_and_excel(doc, out_dir: str = "output"):
                 host_ccy = acc.host_currency_code or ""
 
             for svc in st.services:
-                rows.append({
+                yield {
                     "electronic_statement_index": es_idx,
                     "statement_index": st_idx,
 
@@ -60,29 +68,17 @@ def export_csv_and_excel(doc, out_dir: str = "output"):
 
                     "originalChargeSettlement_amount": (svc.original_charge_settlement.amount if svc.original_charge_settlement else "") or "",
                     "originalChargeSettlement_currencyCode": (svc.original_charge_settlement.currency_code if svc.original_charge_settlement else "") or "",
-                })
-
-    # --------- Write CSV ----------
-    headers = [
-        "electronic_statement_index", "statement_index",
-        "account_id", "debit_account", "iban",
-        "statement_start_date", "statement_end_date",
-        "balance_currency", "settlement_currency", "host_currency",
-        "bankServiceID", "serviceDescription", "serviceType", "volume", "pricingCurrencyCode",
-        "unitPrice_amount", "unitPrice_currencyCode",
-        "originalChargeSettlement_amount", "originalChargeSettlement_currencyCode",
-    ]
-
-    with open(csv_path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=headers)
-        w.writeheader()
-        w.writerows(rows)
-
-    # --------- Write Excel ----------
-    # Requires: pip install pandas openpyxl
-    import pandas as pd
-    df = pd.DataFrame(rows, columns=headers)
-    df.to_excel(xlsx_path, index=False)
-
-    print(f"CSV  : {csv_path.resolve()}")
-    print(f"Excel: {xlsx_path.resolve()}")
+                }
+
+
+def export_csv_and_excel(doc, out_dir: str = "output", formats: Sequence[str] = ("csv", "xlsx")):
+    """
+    Streams the service rows into out_dir/twist_services.<fmt> for each format
+    (csv, xlsx, parquet) in a single pass; no intermediate list or DataFrame.
+    """
+    out_dir = Path(out_dir)
+    paths = [out_dir / f"twist_services.{fmt}" for fmt in formats]
+    export_rows(iter_service_rows(doc), SERVICE_COLUMNS, paths)
+
+    for path in paths:
+        print(f"{path.suffix.lstrip('.').upper()}: {path.resolve()}")
@@ -2,13 +2,24 @@ from dataclasses import dataclass
 from typing import Optional, List
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Money:
     amount: Optional[str]
     currency_code: Optional[str]
 
 
-@dataclass
+# one shared instance for every absent amount; Money is frozen so sharing it is safe
+NO_MONEY = Money(None, None)
+
+
+def money(amount: Optional[str], currency_code: Optional[str]) -> Money:
+    """Money(amount, currency_code), or NO_MONEY when both are missing."""
+    if amount is None and currency_code is None:
+        return NO_MONEY
+    return Money(amount, currency_code)
+
+
+@dataclass(slots=True)
 class Account:
     statement_start_date: Optional[str]
     statement_end_date: Optional[str]
@@ -35,14 +46,14 @@ class Account:
     bank_contact_email: Optional[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class CurrencyTranslation:
     original_currency: Optional[str]
     target_currency: Optional[str]
     translation_value: Optional[str]
     basis: Optional[str]
 
-@dataclass
+@dataclass(slots=True)
 class TaxIdentificationGroup:
     tax_identifier_number: Optional[str]
     tax_identifier_description: Optional[str]
@@ -51,7 +62,7 @@ class TaxIdentificationGroup:
     tax_identifier_price_amount: Money
 
 
-@dataclass
+@dataclass(slots=True)
 class Service:
     bank_service_id: Optional[str]
     service_description: Optional[str]
@@ -69,19 +80,19 @@ class Service:
 
 
 
-@dataclass
+@dataclass(slots=True)
 class TaxHostConversion:
     taxable_service_charge: Money
     taxable_service_charge_host: Money
 
-@dataclass
+@dataclass(slots=True)
 class ServiceDetail:
     bank_service_id: Optional[str]
     service_description: Optional[str]
     original_charge: Money
 
 
-@dataclass
+@dataclass(slots=True)
 class TaxCalculationList:
     tax_identification_number: Optional[str]
     tax_identifier_description: Optional[str]
@@ -89,7 +100,7 @@ class TaxCalculationList:
     tax_identifier_total_tax_amount: Money
 
 
-@dataclass
+@dataclass(slots=True)
 class TaxCalculation:
     host_cur_code: Optional[str]
     tax_host_conversion_list: List[TaxHostConversion]
@@ -98,7 +109,7 @@ class TaxCalculation:
     total_tax_amount: Money
 
 
-@dataclass
+@dataclass(slots=True)
 class TaxRegion:
     tax_region_number: Optional[str]
     tax_region_name: Optional[str]
@@ -110,12 +121,12 @@ class TaxRegion:
     tax_due_to_region: Money
 
 
-@dataclass
+@dataclass(slots=True)
 class TaxDetails:
     tax_regions: List[TaxRegion]
 
 
-@dataclass
+@dataclass(slots=True)
 class ServiceAdjustment:
     type: Optional[str]
     description: Optional[str]
@@ -124,14 +135,14 @@ class ServiceAdjustment:
     service_adjustment_id: Optional[str]
     new_charge: Money
 
-@dataclass
+@dataclass(slots=True)
 class Compensation:
     compensation_identifier: Optional[str]
     compensation_value: Money
     currency_type: Optional[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class Statement:
     account: Optional[Account]
     currency_translation: Optional[CurrencyTranslation]
@@ -141,7 +152,7 @@ class Statement:
     service_adjustment: Optional[ServiceAdjustment]
 
 
-@dataclass
+@dataclass(slots=True)
 class Address:
     address_identifier: Optional[str]
     department_name: Optional[str]
@@ -158,7 +169,7 @@ class Address:
     room: Optional[str]
 
 
-@dataclass
+@dataclass(slots=True)
 class ContactInfo:
     individual_contact: Optional[str]
     phone: Optional[str]
@@ -166,12 +177,12 @@ class ContactInfo:
     email: Optional[str]
     post_Address: Optional[Address]
 
-@dataclass
+@dataclass(slots=True)
 class OrgId:
     org_id_type: Optional[str]
     org_id_num: Optional[str]
 
-@dataclass
+@dataclass(slots=True)
 class SendParty:
     name: Optional[str]
     legal_name: Optional[str]
@@ -179,26 +190,26 @@ class SendParty:
     org_id: Optional[OrgId]
 
 
-@dataclass
+@dataclass(slots=True)
 class StatementHeader:
     stmt_reciver: Optional[SendParty]
     stmt_sender: Optional[SendParty]
 
-@dataclass
+@dataclass(slots=True)
 class ElectronicStatement:
     statement_list: List[Statement]
     statement_header: Optional[StatementHeader]
 
-@dataclass
+@dataclass(slots=True)
 class TypedPartyId:
     party_id: Optional[str]
     party_id_type: Optional[str]
 
-@dataclass
+@dataclass(slots=True)
 class SentBy:
     type_party_id: Optional[TypedPartyId]
 
-@dataclass
+@dataclass(slots=True)
 class Header:
     message_id: Optional[str]
     in_reply_to: Optional[str]
@@ -207,7 +218,7 @@ class Header:
 
 
 
-@dataclass
+@dataclass(slots=True)
 class TwistDocument:
     header: Optional[Header]
     electronic_statement_list: Optional[ElectronicStatement]
@@ -2,7 +2,8 @@ from xml.etree.ElementTree import iterparse, Element
 from typing import Optional, List
 
 from src.twist_old.model import Money, Account, CurrencyTranslation, Service, TaxDetails, TaxRegion, ServiceDetail, \
-    TaxCalculationList, TaxCalculation, ServiceAdjustment, TwistDocument, ElectronicStatement, Statement
+    TaxCalculationList, TaxCalculation, ServiceAdjustment, TwistDocument, ElectronicStatement, Statement, \
+    TaxIdentificationGroup, TaxHostConversion, Compensation, NO_MONEY, money
 
 
 # ---- helpers ----
@@ -13,12 +14,11 @@ def _t(e: Optional[Element]) -> Optional[str]:
     return s or None
 
 def _money(parent: Optional[Element], base: str) -> Money:
-    if parent is None:
-        return Money(None, None)
-    return Money(
-        amount=_t(parent.find(f"{base}/amount")),
-        currency_code=_t(parent.find(f"{base}/currencyCode")),
-    )
+    # absent amounts share NO_MONEY instead of allocating Money(None, None) each
+    node = parent.find(base) if parent is not None else None
+    if node is None:
+        return NO_MONEY
+    return money(_t(node.find("amount")), _t(node.find("currencyCode")))
 
 # ---- leaf parsers (parse a whole subtree when its END tag fires) ----
 def _parse_account(acc: Element) -> Account:
@@ -29,6 +29,9 @@ def _parse_account(acc: Element) -> Account:
         statement_status=_t(acc.find("statementStatus")),
         account_level=_t(acc.find("accountLevel")),
         iban=_t(acc.find("iban")),
+        bban=_t(acc.find("bban")),
+        account_name=_t(acc.find("accountName")),
+        domicile_bank_qualifier=_t(acc.find("domicileBankQualifier")),
         domicile_bank_identifier=_t(acc.find("domicileBankIdentifier")),
         compensation_method=_t(acc.find("compensationMethod")),
         debit_account=_t(acc.find("debitAccount")),
@@ -64,20 +67,42 @@ def _parse_service(s: Element) -> Service:
         price_method=_t(s.find("priceMethod")),
         payment_method=_t(s.find("paymentMethod")),
         original_charge_settlement=_money(s, "originalChargeSettlement"),
+        tax_designation=_t(s.find("taxDesignation")),
+        original_charge_price=_money(s, "originalChargePrice"),
+        total_charge_settlement=_money(s, "totalChargeSettlementAmount"),
+        tax_identification_group=_parse_tax_identification_group(s.find("taxIdentificationGroup")),
+    )
+
+def _parse_tax_identification_group(g: Optional[Element]) -> Optional[TaxIdentificationGroup]:
+    if g is None:
+        return None
+    return TaxIdentificationGroup(
+        tax_identifier_number=_t(g.find("taxIdentifierNumber")),
+        tax_identifier_description=_t(g.find("taxIdentifierDescription")),
+        tax_identifier_rate=_t(g.find("taxIdentifierRate")),
+        tax_identifier_host_amount=_money(g, "taxIdentifierHostAmount"),
+        tax_identifier_price_amount=_money(g, "taxIdentifierPriceAmount"),
+    )
+
+def _parse_compensation(c: Element) -> Compensation:
+    return Compensation(
+        compensation_identifier=_t(c.find("compensationIdentifier")),
+        compensation_value=_money(c, "compensationValue"),
+        currency_type=_t(c.find("currencyType")),
     )
 
 def _parse_tax_details(td: Element) -> TaxDetails:
     regions: List[TaxRegion] = []
     for tr in td.findall("./taxRegion"):
-        # serviceDetail (optional)
-        sd_node = tr.find("serviceDetail")
-        service_detail = None
-        if sd_node is not None:
-            service_detail = ServiceDetail(
+        # serviceDetail (0..n)
+        service_details = [
+            ServiceDetail(
                 bank_service_id=_t(sd_node.find("bankServiceId")),
                 service_description=_t(sd_node.find("serviceDescription")),
                 original_charge=_money(sd_node, "originalCharge"),
             )
+            for sd_node in tr.findall("serviceDetail")
+        ]
 
         # taxCalculation (optional)
         tc_node = tr.find("taxCalculation")
@@ -96,8 +121,13 @@ def _parse_tax_details(td: Element) -> TaxDetails:
 
             tax_calc = TaxCalculation(
                 host_cur_code=_t(tc_node.find("hostCurCode")),
-                taxable_service_charge=_money(tc_node, "taxHostConversion/taxableServiceCharge"),
-                taxable_service_charge_host=_money(tc_node, "taxHostConversion/taxableServiceChargeHost"),
+                tax_host_conversion_list=[
+                    TaxHostConversion(
+                        taxable_service_charge=_money(hc, "taxableServiceCharge"),
+                        taxable_service_charge_host=_money(hc, "taxableServiceChargeHost"),
+                    )
+                    for hc in tc_node.findall("taxHostConversion")
+                ],
                 total_taxable_svc_charge_host_amount=_money(tc_node, "totalTaxableSvcChargeHostAmount"),
                 tax_calculation_list=tcl_list,
                 total_tax_amount=_money(tc_node, "totalTaxAmount"),
@@ -109,7 +139,7 @@ def _parse_tax_details(td: Element) -> TaxDetails:
                 tax_region_name=_t(tr.find("taxRegionName")),
                 customer_tax_id=_t(tr.find("customerTaxId")),
                 tax_invoice_number=_t(tr.find("taxInvoiceNumber")),
-                service_detail=service_detail,
+                service_details=service_details,
                 tax_calculation=tax_calc,
                 settlement_amount=_money(tr, "settlementAmount"),
                 tax_due_to_region=_money(tr, "taxDueToRegion"),
@@ -152,6 +182,7 @@ def parse_twist_multi(xml_path: str) -> TwistDocument:
                 current_statement = Statement(
                     account=None,
                     currency_translation=None,
+                    compensations=[],
                     services=[],
                     tax_details=None,
                     service_adjustment=None,
@@ -165,6 +196,9 @@ def parse_twist_multi(xml_path: str) -> TwistDocument:
         elif tag == "currencyTranslation" and in_stmt and current_statement:
             current_statement.currency_translation = _parse_currency_translation(elem)
 
+        elif tag == "compensation" and in_stmt and current_statement:
+            current_statement.compensations.append(_parse_compensation(elem))
+
         elif tag == "service" and in_stmt and current_statement:
             current_statement.services.append(_parse_service(elem))
 
@@ -184,6 +218,10 @@ def parse_twist_multi(xml_path: str) -> TwistDocument:
             current_es_statements = []
             in_es = False
 
+        else:
+            # leaves inside a subtree are read when the subtree's own END fires; keep them until then
+            continue
+
         # memory cleanup
         elem.clear()
 
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import io
+import mmap
+import os
+import re
+import sys
+from bisect import bisect_right
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from src.x12_parallel import parallel_map_ordered
+
+_NAME = b"electronicStatement"
+# what may precede the name inside its tag: "<", "</", optionally with a namespace prefix
+_TAG_OPEN = re.compile(rb"<(/?)(?:[A-Za-z_][\w.\-]*:)?\Z")
+_TAG_REST = re.compile(rb"(?:[^>\"']|\"[^\"]*\"|'[^']*')*?(/?)>")
+_ROOT = re.compile(rb"<([A-Za-z_][\w.\-]*(?::[A-Za-z_][\w.\-]*)?)(?:[^>\"']|\"[^\"]*\"|'[^']*')*>")
+_PROLOG_ITEM = re.compile(rb"\s*(?:<\?.*?\?>|<!--.*?-->|<!DOCTYPE(?:[^\[>]|\[.*?\])*>)", re.S)
+
+
+class StatementRanges(NamedTuple):
+    head: bytes  # prolog + root start tag, namespace declarations included
+    tail: bytes  # root end tag
+    ranges: List[Tuple[int, int]]  # [start, end) of each top-level <electronicStatement>
+
+
+def scan_statement_ranges(path: Union[str, Path]) -> StatementRanges:
+    """
+    Byte ranges of the top-level <electronicStatement> elements of a TWIST file, found by
+    searching a memory map for the tag name (no XML parsing). Each range parses on its own
+    as head + file[start:end] + tail.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"{path} is empty")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:2] in (b"\xff\xfe", b"\xfe\xff"):
+                raise ValueError(f"{path}: UTF-16 TWIST files cannot be split by byte range")
+
+            pos = 0
+            while True:
+                m = _PROLOG_ITEM.match(mm, pos)
+                if m is None or m.end() == pos:
+                    break
+                pos = m.end()
+            root = _ROOT.match(mm, mm.find(b"<", pos))
+            if root is None:
+                raise ValueError(f"{path}: no root element found")
+            head = mm[:root.end()]
+            tail = b"</" + root.group(1) + b">"
+
+            ranges: List[Tuple[int, int]] = []
+            skipped = _comment_spans(mm, root.end())
+            depth = 0
+            start = -1
+            hit = mm.find(_NAME, root.end())
+            while hit != -1:
+                after = mm[hit + len(_NAME):hit + len(_NAME) + 1]
+                lead = _TAG_OPEN.search(mm[max(0, hit - 64):hit])
+                if lead is None or after not in (b" ", b"\t", b"\r", b"\n", b"/", b">") or _inside(skipped, hit):
+                    hit = mm.find(_NAME, hit + 1)
+                    continue
+                tag_start = hit - (len(lead.group(0)))
+                rest = _TAG_REST.match(mm, hit + len(_NAME))
+                tag_end = rest.end() if rest else hit + len(_NAME)
+                if rest and rest.group(1):  # <electronicStatement/>
+                    if depth == 0:
+                        ranges.append((tag_start, tag_end))
+                elif not lead.group(1):
+                    if depth == 0:
+                        start = tag_start
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        ranges.append((start, tag_end))
+                hit = mm.find(_NAME, tag_end)
+            return StatementRanges(head, tail, ranges)
+
+
+def _comment_spans(mm: mmap.mmap, pos: int) -> List[Tuple[int, int]]:
+    # comments and CDATA, so a tag quoted inside them is not taken as a boundary
+    spans = []
+    for opener, closer in ((b"<!--", b"-->"), (b"<![CDATA[", b"]]>")):
+        i = mm.find(opener, pos)
+        while i != -1:
+            j = mm.find(closer, i + len(opener))
+            j = len(mm) if j == -1 else j + len(closer)
+            spans.append((i, j))
+            i = mm.find(opener, j)
+    spans.sort()
+    return spans
+
+
+def _inside(spans: List[Tuple[int, int]], pos: int) -> bool:
+    i = bisect_right(spans, (pos, sys.maxsize)) - 1
+    return i >= 0 and spans[i][0] <= pos < spans[i][1]
+
+
+def _parse_range(
+    extract: Callable[[Any], Iterable[Dict[str, Any]]],
+    task: Tuple[str, bytes, int, int, bytes],
+) -> List[Dict[str, Any]]:
+    path, head, start, end, tail = task
+    with open(path, "rb") as f:
+        f.seek(start)
+        body = f.read(end - start)
+    return list(extract(io.BytesIO(head + body + tail)))
+
+
+def source_path(source) -> Path:
+    """
+    A path for a path-like source or a file opened from one; workers reopen the file by name.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return Path(source)
+    name = getattr(source, "name", None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return Path(name)
+    raise ValueError("parallel TWIST parsing needs a file path or a file opened from one")
+
+
+def iter_rows_parallel(
+    source,
+    extract: Callable[[Any], Iterable[Dict[str, Any]]],
+    workers: Optional[int] = None,
+    chunksize: int = 1,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Splits the file at top-level <electronicStatement> boundaries, runs extract (a module-level
+    generator such as twist_stream.iter_service_rows, or a functools.partial of one) over each
+    range in a process pool, `chunksize` ranges per task, and yields the rows in document order.
+
+    Rows only come from root/electronicStatement/statement, so nothing outside the ranges is lost.
+    One electronicStatement is never split, so a file with a single block gains nothing.
+    """
+    path = source_path(source)
+    head, tail, ranges = scan_statement_ranges(path)
+    tasks = ((str(path), head, start, end, tail) for start, end in ranges)
+    for rows in parallel_map_ordered(partial(_parse_range, extract), tasks, workers=workers, chunksize=chunksize):
+        yield from rows
@@ -2,20 +2,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
 from typing import Optional, List
-import xml.etree.ElementTree as ET
 
-NS = {"tw": "http://www.twiststandards.org/3.1/ElectronicBilling"}
-
-def _txt(el: Optional[ET.Element]) -> Optional[str]:
-    if el is None or el.text is None:
-        return None
-    s = el.text.strip()
-    return s if s else None
+from src.twist_parallel import iter_rows_parallel
+from src.twist_stream import iter_compensations
 
-def _find_text(parent: ET.Element, path: str) -> Optional[str]:
-    return _txt(parent.find(path, NS))
+NS = {"tw": "http://www.twiststandards.org/3.1/ElectronicBilling"}
 
 @dataclass
 class CompensationRecord:
@@ -36,52 +30,22 @@ class CompensationRecord:
     currency_type: Optional[str] = None
 
 
-def parse_all_compensations(path: str | Path) -> List[CompensationRecord]:
-    path = Path(path)
-    out: List[CompensationRecord] = []
-
-    # stream parse
-    for event, elem in ET.iterparse(path, events=("end",)):
-        # each <electronicStatement> contains 1..N <statement>
-        if elem.tag == f"{{{NS['tw']}}}electronicStatement":
-            for st_el in elem.findall("tw:statement", NS):
-                acct = st_el.find("tw:account", NS)
-
-                # account context (same for every comp inside this statement)
-                ctx = {
-                    "account_level": _find_text(acct, "tw:accountLevel") if acct is not None else None,
-                    "bban": _find_text(acct, "tw:bban") if acct is not None else None,
-                    "iban": _find_text(acct, "tw:iban") if acct is not None else None,
-                    "account_name": _find_text(acct, "tw:accountName") if acct is not None else None,
-                    "domicile_bank_identifier": _find_text(acct, "tw:domicileBankIdentifier") if acct is not None else None,
-                    "statement_start_date": _find_text(acct, "tw:statementStartDate") if acct is not None else None,
-                    "statement_end_date": _find_text(acct, "tw:statementEndDate") if acct is not None else None,
-                    "statement_production_date": _find_text(acct, "tw:statementProductionDate") if acct is not None else None,
-                }
-
-                # 0..N compensations under a statement
-                for comp in st_el.findall("tw:compensation", NS):
-                    comp_identifier = _find_text(comp, "tw:compensationIdentifier")
-
-                    comp_val = comp.find("tw:compensationValue", NS)
-                    amount = _find_text(comp_val, "tw:amount") if comp_val is not None else None
-                    currency = _find_text(comp_val, "tw:currency") if comp_val is not None else None
-
-                    currency_type = _find_text(comp, "tw:currencyType")
-
-                    out.append(
-                        CompensationRecord(
-                            **ctx,
-                            compensation_identifier=comp_identifier,
-                            amount=amount,
-                            currency=currency,
-                            currency_type=currency_type,
-                        )
-                    )
-
-            elem.clear()
-
-    return out
+def parse_all_compensations(
+    path: str | Path,
+    backend: str = "auto",
+    workers: Optional[int] = 1,
+    chunksize: int = 1,
+) -> List[CompensationRecord]:
+    """
+    One CompensationRecord per <compensation>, read statement by statement. backend="auto"
+    uses lxml when it is installed, "etree" forces the standard library. workers > 1 parses
+    the top-level <electronicStatement> blocks in a process pool, as parse_twist does.
+    """
+    if workers == 1:
+        records = iter_compensations(Path(path), backend)
+    else:
+        records = iter_rows_parallel(path, partial(iter_compensations, backend=backend), workers, chunksize)
+    return [CompensationRecord(**rec) for rec in records]
 
 
 # ---- Example ----
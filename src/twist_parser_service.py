@@ -2,9 +2,11 @@ from __future__ import annotations
 
 from dataclasses import dataclass, asdict, field
 from pathlib import Path
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Iterator, Union
 import xml.etree.ElementTree as ET
 
+from src.twist_stream import SERVICE_FIELDS_UNITS, iter_service_rows
+
 
 TWIST_NS = "http://www.twiststandards.org/3.1/ElectronicBilling"
 NS = {"t": TWIST_NS}
@@ -57,46 +59,20 @@ class AccountServiceRow:
     account: AccountTag
     service: Service
 
-def parse_twist_flat_service_rows(path: Union[str, Path]) -> List[Dict[str, Any]]:
+def iter_twist_flat_service_rows(path: Union[str, Path], backend: str = "auto") -> Iterator[Dict[str, Any]]:
+    """
+    Generator form of parse_twist_flat_service_rows: rows are yielded per closed </statement>.
+    """
+    return iter_service_rows(Path(path), SERVICE_FIELDS_UNITS, backend=backend)
+
+
+def parse_twist_flat_service_rows(path: Union[str, Path], backend: str = "auto") -> List[Dict[str, Any]]:
     """
     Returns a LIST of dicts (one per <service>) with:
       bban, statement_start_date, statement_end_date, statement_production_date,
       account_currency, service_code, service_description, service_type, tax_designation
     """
-    root = ET.parse(Path(path)).getroot()
-    rows: List[Dict[str, Any]] = []
-
-    for est in root.findall("t:electronicStatement", NS):
-        for stmt in est.findall("t:statement", NS):
-            acc_el = stmt.find("t:account", NS)
-
-            account_id = _txt(acc_el, "t:bban")
-            from_dt = _txt(acc_el, "t:statementStartDate")
-            to_dt = _txt(acc_el, "t:statementEndDate")
-            invoice_dt = _txt(acc_el, "t:statementProductionDate")
-            currency = _txt(acc_el, "t:accountBalanceCurrencyCode")
-
-            for svc_el in stmt.findall("t:service", NS):
-                service_type = _txt(svc_el, "t:serviceType")
-                if(service_type is not None):
-                    rows.append(
-                        {
-                            "account_id": account_id,
-                            "from_dt": from_dt,
-                            "to_dt": to_dt,
-                            "invoice_dt": invoice_dt,
-                            "currency": currency,
-                            "service_code": _txt(svc_el, "t:bankServiceID"),
-                            "service_description": _txt(svc_el, "t:serviceDescription"),
-                            "charge_amount": _txt(svc_el, "t:originalChargePrice/t:amount"),
-                            "volume": _txt(svc_el, "t:volume"),
-                            "units": _txt(svc_el, "t:unitPrice/t:amount"),
-                            "service_type": _txt(svc_el, "t:serviceType"),
-                            "tax_designation": _txt(svc_el, "t:taxDesignation"),
-                        }
-                    )
-
-    return rows
+    return list(iter_twist_flat_service_rows(path, backend))
 
 # def parse_twist_account_services_file(path: Union[str, Path]) -> List[Dict[str, Any]]:
 #     """
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import xml.etree.ElementTree as ET
+
+from src.twist_stream import _children, _text, iter_statements, namespace_of
+
+FAMILIES = (
+    "services",
+    "compensations",
+    "tax_regions",
+    "tax_calculations",
+    "service_adjustments",
+    "currency_translations",
+)
+
+# statement context carried by every record: output column -> <account> child
+CONTEXT_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("account_id", "bban"),
+    ("iban", "iban"),
+    ("account_name", "accountName"),
+    ("account_level", "accountLevel"),
+    ("from_dt", "statementStartDate"),
+    ("to_dt", "statementEndDate"),
+    ("invoice_dt", "statementProductionDate"),
+    ("currency", "accountBalanceCurrencyCode"),
+)
+
+# plain text children per family: output column -> local name
+SERVICE_TEXT = (
+    ("service_code", "bankServiceID"),
+    ("service_description", "serviceDescription"),
+    ("service_type", "serviceType"),
+    ("volume", "volume"),
+    ("pricing_currency", "pricingCurrencyCode"),
+    ("price_method", "priceMethod"),
+    ("payment_method", "paymentMethod"),
+    ("tax_designation", "taxDesignation"),
+)
+# money children: column prefix -> local name; each gives <prefix>_amount and <prefix>_currency
+SERVICE_MONEY = (
+    ("unit_price", "unitPrice"),
+    ("charge", "originalChargePrice"),
+    ("charge_settlement", "originalChargeSettlement"),
+    ("total_settlement", "totalChargeSettlementAmount"),
+)
+COMPENSATION_TEXT = (("compensation_identifier", "compensationIdentifier"), ("currency_type", "currencyType"))
+COMPENSATION_MONEY = (("compensation", "compensationValue"),)
+TAX_REGION_TEXT = (
+    ("tax_region_number", "taxRegionNumber"),
+    ("tax_region_name", "taxRegionName"),
+    ("customer_tax_id", "customerTaxId"),
+    ("tax_invoice_number", "taxInvoiceNumber"),
+)
+TAX_REGION_MONEY = (("settlement", "settlementAmount"), ("tax_due", "taxDueToRegion"))
+TAX_CALCULATION_MONEY = (("taxable_host", "totalTaxableSvcChargeHostAmount"), ("total_tax", "totalTaxAmount"))
+TAX_LINE_TEXT = (
+    ("tax_id", "taxIdentificationNumber"),
+    ("tax_description", "taxIdentifierDescription"),
+    ("tax_rate", "taxIdentifierRate"),
+)
+TAX_LINE_MONEY = (("tax", "taxIdentifierTotalTaxAmount"),)
+ADJUSTMENT_TEXT = (
+    ("adjustment_type", "Type"),
+    ("adjustment_description", "description"),
+    ("adjustment_error_date", "adjustmentErrorDate"),
+    ("adjustment_id", "serviceAdjustmentID"),
+)
+ADJUSTMENT_MONEY = (("adjustment", "serviceAdjustmentAmt"), ("new_charge", "newCharge"))
+TRANSLATION_TEXT = (
+    ("original_currency", "originalCurrency"),
+    ("target_currency", "targetCurrency"),
+    ("translation_value", "translationValue"),
+    ("basis", "basis"),
+)
+
+
+class _Names:
+    """
+    Fully-qualified tags for one namespace, built once per namespace seen.
+    """
+
+    def __init__(self, namespace: str):
+        q = (lambda local: f"{{{namespace}}}{local}") if namespace else (lambda local: local)
+        self.q = q
+        self.account = q("account")
+        self.service = q("service")
+        self.compensation = q("compensation")
+        self.tax_details = q("taxDetails")
+        self.tax_region = q("taxRegion")
+        self.tax_calculation = q("taxCalculation")
+        self.tax_line = q("taxCalculationList")
+        self.host_cur_code = q("hostCurCode")
+        self.adjustment = q("serviceAdjustment")
+        self.translation = q("currencyTranslation")
+        self.amount = q("amount")
+        # TWIST 3.1 uses <currency>, older/vendor files <currencyCode>
+        self.money_currency = (q("currency"), q("currencyCode"))
+        self.context = tuple((name, q(local)) for name, local in CONTEXT_FIELDS)
+        self._compiled: Dict[int, Tuple[Tuple[Tuple[str, str], ...], Tuple[Tuple[str, str, str], ...]]] = {}
+
+    def fields(self, text, money):
+        # text/money are the module-level layout tuples above, so their ids are stable keys
+        key = id(text), id(money)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = self._compiled[key] = (
+                tuple((name, self.q(local)) for name, local in text),
+                tuple((f"{prefix}_amount", f"{prefix}_currency", self.q(local)) for prefix, local in money),
+            )
+        return compiled
+
+
+_NAMES: Dict[str, _Names] = {}
+
+
+def _names(tag: str) -> _Names:
+    ns = namespace_of(tag)
+    names = _NAMES.get(ns)
+    if names is None:
+        names = _NAMES[ns] = _Names(ns)
+    return names
+
+
+def _fill(row: Dict[str, Any], el: ET.Element, names: _Names, text, money) -> Dict[str, Any]:
+    # one walk over el's children, then dict lookups per column
+    children = _children(el)
+    text_fields, money_fields = names.fields(text, money)
+    for name, tag in text_fields:
+        row[name] = _text(children.get(tag))
+    for amount_col, currency_col, tag in money_fields:
+        node = children.get(tag)
+        if node is None:
+            row[amount_col] = row[currency_col] = None
+            continue
+        inner = _children(node)
+        row[amount_col] = _text(inner.get(names.amount))
+        cur = inner.get(names.money_currency[0])
+        row[currency_col] = _text(cur if cur is not None else inner.get(names.money_currency[1]))
+    return row
+
+
+# ---- family extractors: (statement children by tag, names, context) -> rows ----
+def _services(groups, names: _Names, context) -> Iterator[Dict[str, Any]]:
+    for el in groups.get(names.service, ()):
+        yield _fill(dict(context), el, names, SERVICE_TEXT, SERVICE_MONEY)
+
+
+def _compensations(groups, names: _Names, context) -> Iterator[Dict[str, Any]]:
+    for el in groups.get(names.compensation, ()):
+        yield _fill(dict(context), el, names, COMPENSATION_TEXT, COMPENSATION_MONEY)
+
+
+def _tax_regions_of(groups, names: _Names) -> Iterator[ET.Element]:
+    for details in groups.get(names.tax_details, ()):
+        yield from details.iterfind(names.tax_region)
+
+
+def _tax_regions(groups, names: _Names, context) -> Iterator[Dict[str, Any]]:
+    for region in _tax_regions_of(groups, names):
+        row = _fill(dict(context), region, names, TAX_REGION_TEXT, TAX_REGION_MONEY)
+        calc = region.find(names.tax_calculation)
+        row["host_currency"] = _text(calc.find(names.host_cur_code)) if calc is not None else None
+        if calc is not None:
+            _fill(row, calc, names, (), TAX_CALCULATION_MONEY)
+        else:
+            for prefix, _ in TAX_CALCULATION_MONEY:
+                row[f"{prefix}_amount"] = row[f"{prefix}_currency"] = None
+        yield row
+
+
+def _tax_calculations(groups, names: _Names, context) -> Iterator[Dict[str, Any]]:
+    for region in _tax_regions_of(groups, names):
+        region_number = _text(region.find(names.q("taxRegionNumber")))
+        calc = region.find(names.tax_calculation)
+        if calc is None:
+            continue
+        for line in calc.iterfind(names.tax_line):
+            row = dict(context)
+            row["tax_region_number"] = region_number
+            yield _fill(row, line, names, TAX_LINE_TEXT, TAX_LINE_MONEY)
+
+
+def _service_adjustments(groups, names: _Names, context) -> Iterator[Dict[str, Any]]:
+    for el in groups.get(names.adjustment, ()):
+        yield _fill(dict(context), el, names, ADJUSTMENT_TEXT, ADJUSTMENT_MONEY)
+
+
+def _currency_translations(groups, names: _Names, context) -> Iterator[Dict[str, Any]]:
+    for el in groups.get(names.translation, ()):
+        yield _fill(dict(context), el, names, TRANSLATION_TEXT, ())
+
+
+_EXTRACTORS: Dict[str, Callable[[Dict[str, List[ET.Element]], _Names, Dict[str, Any]], Iterator[Dict[str, Any]]]] = {
+    "services": _services,
+    "compensations": _compensations,
+    "tax_regions": _tax_regions,
+    "tax_calculations": _tax_calculations,
+    "service_adjustments": _service_adjustments,
+    "currency_translations": _currency_translations,
+}
+
+
+def iter_records(
+    source,
+    families: Iterable[str] = FAMILIES,
+    backend: str = "auto",
+    namespace: Optional[str] = None,
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    One streaming pass over a TWIST file yielding (family, row) for every requested family,
+    statement by statement in document order. Every row starts with statement_seq (0-based
+    statement number in the file) and the CONTEXT_FIELDS of its <account>.
+
+    Families not requested are never extracted. `namespace` defaults to the root element's,
+    so TWIST 3.1 files and namespace-less vendor files (data/Oracle_Parser.xml) both work.
+    """
+    wanted = tuple(families)
+    for family in wanted:
+        if family not in _EXTRACTORS:
+            raise ValueError(f"Unknown TWIST record family: {family}")
+    extractors = [(family, _EXTRACTORS[family]) for family in wanted]
+
+    for seq, stmt in enumerate(iter_statements(source, backend, namespace)):
+        names = _names(stmt.tag)
+        groups: Dict[str, List[ET.Element]] = {}
+        for child in stmt:
+            groups.setdefault(child.tag, []).append(child)
+
+        accounts = groups.get(names.account)
+        account = _children(accounts[0]) if accounts else {}
+        context: Dict[str, Any] = {"statement_seq": seq}
+        for name, tag in names.context:
+            context[name] = _text(account.get(tag))
+
+        for family, extract in extractors:
+            for row in extract(groups, names, context):
+                yield family, row
+
+
+def collect_records(
+    source,
+    families: Iterable[str] = FAMILIES,
+    backend: str = "auto",
+    namespace: Optional[str] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    iter_records gathered into {family: rows} for multi-table loads.
+    """
+    wanted = tuple(families)
+    out: Dict[str, List[Dict[str, Any]]] = {family: [] for family in wanted}
+    for family, row in iter_records(source, wanted, backend, namespace):
+        out[family].append(row)
+    return out
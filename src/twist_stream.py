@@ -0,0 +1,453 @@
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import xml.etree.ElementTree as ET
+
+
+TWIST_NS = "http://www.twiststandards.org/3.1/ElectronicBilling"
+NS = {"t": TWIST_NS}
+
+_ELECTRONIC_STATEMENT = f"{{{TWIST_NS}}}electronicStatement"
+_STATEMENT = f"{{{TWIST_NS}}}statement"
+
+# output column -> path under <account> / <service>, in row order
+ACCOUNT_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("account_id", "t:bban"),
+    ("from_dt", "t:statementStartDate"),
+    ("to_dt", "t:statementEndDate"),
+    ("invoice_dt", "t:statementProductionDate"),
+    ("currency", "t:accountBalanceCurrencyCode"),
+)
+SERVICE_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("service_code", "t:bankServiceID"),
+    ("service_description", "t:serviceDescription"),
+    ("charge_amount", "t:originalChargePrice/t:amount"),
+    ("volume", "t:volume"),
+    ("unit_price", "t:unitPrice/t:amount"),
+    ("service_type", "t:serviceType"),
+    ("tax_designation", "t:taxDesignation"),
+)
+# twist_parser_latest / twist_parser_service name the unit price column "units"
+SERVICE_FIELDS_UNITS = tuple(("units", p) if name == "unit_price" else (name, p) for name, p in SERVICE_FIELDS)
+
+# statement context and fields of twist_parser.CompensationRecord
+COMPENSATION_CONTEXT_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("account_level", "t:accountLevel"),
+    ("bban", "t:bban"),
+    ("iban", "t:iban"),
+    ("account_name", "t:accountName"),
+    ("domicile_bank_identifier", "t:domicileBankIdentifier"),
+    ("statement_start_date", "t:statementStartDate"),
+    ("statement_end_date", "t:statementEndDate"),
+    ("statement_production_date", "t:statementProductionDate"),
+)
+
+# "auto" uses lxml when it is installed and the source can be read as bytes
+BACKENDS = ("auto", "etree", "lxml")
+
+
+def _qualified(namespace: str, local: str) -> str:
+    return f"{{{namespace}}}{local}" if namespace else local
+
+
+def namespace_of(tag: str) -> str:
+    """Namespace URI of a "{uri}local" tag; "" for an unqualified tag."""
+    return tag[1:tag.index("}")] if tag[:1] == "{" else ""
+
+
+def _qualify(path: str, namespace: str = TWIST_NS) -> Tuple[str, ...]:
+    """"t:a/t:b" -> ("{ns}a", "{ns}b"); the prefix is optional and stands for the document's namespace."""
+    return tuple(_qualified(namespace, step.rpartition(":")[2]) for step in path.split("/"))
+
+
+def _compile_fields(
+    fields: Tuple[Tuple[str, str], ...],
+    namespace: str = TWIST_NS,
+) -> Tuple[Tuple[str, Tuple[str, ...], str], ...]:
+    # (column, qualified steps, qualified "a/b" path for the find() fallback)
+    out = []
+    for name, path in fields:
+        qnames = _qualify(path, namespace)
+        out.append((name, qnames, "/".join(qnames)))
+    return tuple(out)
+
+
+def _children(el: ET.Element) -> Dict[str, ET.Element]:
+    # one walk over the children; reversed so the first child with a tag wins, like find()
+    return {c.tag: c for c in reversed(el)}
+
+
+def _text(node: Optional[ET.Element]) -> Optional[str]:
+    if node is None or node.text is None:
+        return None
+    v = node.text.strip()
+    return v if v else None
+
+
+def _resolve(el: ET.Element, children: Dict[str, ET.Element], qnames: Tuple[str, ...], path: str) -> Optional[str]:
+    node = children.get(qnames[0])
+    if node is None:
+        return None
+    for q in qnames[1:]:
+        node = node.find(q)
+        if node is None:
+            # find("a/b") also looks under later <a> siblings; rare, so only checked on a miss
+            return _text(el.find(path))
+    return _text(node)
+
+
+@dataclass(frozen=True)
+class RecordSpec:
+    """
+    Declarative row layout: one row per `record` element under each statement, with the
+    `context` columns (paths from the statement, e.g. "account/bban") followed by the
+    `fields` columns (paths from the record). Paths are "/"-joined element names with an
+    optional "t:" prefix; the namespace is taken from the document, so one spec serves
+    TWIST 3.1 and namespace-less files. Records with an empty `required` path are skipped.
+    """
+
+    record: str
+    fields: Tuple[Tuple[str, str], ...]
+    context: Tuple[Tuple[str, str], ...] = ()
+    required: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_mapping(cls, mapping: Dict[str, Any]) -> "RecordSpec":
+        """
+        {"record": "service", "context": {"account_id": "account/bban"},
+         "fields": {"service_code": "bankServiceID"}, "required": ["serviceType"]}
+        """
+        return cls(
+            record=mapping["record"],
+            fields=tuple(dict(mapping["fields"]).items()),
+            context=tuple(dict(mapping.get("context") or {}).items()),
+            required=tuple(mapping.get("required") or ()),
+        )
+
+
+class CompiledSpec:
+    """
+    A RecordSpec bound to one namespace: every path qualified once, context paths grouped by
+    the statement child they start from. Built by compile_spec, which caches it.
+    """
+
+    def __init__(self, spec: RecordSpec, namespace: str):
+        self.spec = spec
+        self.namespace = namespace
+        self.record = "/".join(_qualify(spec.record, namespace))
+        self.fields = _compile_fields(spec.fields, namespace)
+        self.required = _compile_fields(tuple(("", p) for p in spec.required), namespace)
+        # statement child -> [(column, steps below it, path below it)]; a bare child reads its own text
+        groups: Dict[str, List[Tuple[str, Tuple[str, ...], str]]] = {}
+        for name, qnames, _ in _compile_fields(spec.context, namespace):
+            groups.setdefault(qnames[0], []).append((name, qnames[1:], "/".join(qnames[1:])))
+        self.context = tuple((head, tuple(cols)) for head, cols in groups.items())
+        self.columns = tuple(name for name, _ in spec.context) + tuple(name for name, _ in spec.fields)
+
+    def _context(self, stmt: ET.Element) -> Dict[str, Any]:
+        values: Dict[str, Any] = {}
+        for head, cols in self.context:
+            node = stmt.find(head)
+            children = _children(node) if node is not None else None
+            for name, qnames, path in cols:
+                if node is None:
+                    values[name] = None
+                elif not qnames:
+                    values[name] = _text(node)
+                else:
+                    values[name] = _resolve(node, children, qnames, path)
+        # spec order, whatever the grouping
+        return {name: values[name] for name, _ in self.spec.context}
+
+    def rows(self, stmt: ET.Element, extra: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        context = self._context(stmt)
+        fields, required = self.fields, self.required
+        for el in stmt.iterfind(self.record):
+            children = _children(el)
+            skip = False
+            for _, q, path in required:
+                if _resolve(el, children, q, path) is None:
+                    skip = True
+                    break
+            if skip:
+                continue
+            row = dict(context)
+            for name, q, path in fields:
+                row[name] = _resolve(el, children, q, path)
+            row.update(extra)
+            yield row
+
+
+_COMPILED_SPECS: Dict[Tuple[RecordSpec, str], CompiledSpec] = {}
+
+
+def compile_spec(spec: RecordSpec, namespace: str = TWIST_NS) -> CompiledSpec:
+    """The cached CompiledSpec for (spec, namespace)."""
+    key = (spec, namespace)
+    compiled = _COMPILED_SPECS.get(key)
+    if compiled is None:
+        compiled = _COMPILED_SPECS[key] = CompiledSpec(spec, namespace)
+    return compiled
+
+
+def service_spec(service_fields: Tuple[Tuple[str, str], ...] = SERVICE_FIELDS) -> RecordSpec:
+    """The parse_twist layout: ACCOUNT_FIELDS of <account>, then `service_fields`; charges only."""
+    return RecordSpec(
+        record="t:service",
+        fields=service_fields,
+        context=tuple((name, f"t:account/{path}") for name, path in ACCOUNT_FIELDS),
+        # services without a serviceType are not charges
+        required=("t:serviceType",),
+    )
+
+
+SERVICE_SPEC = service_spec(SERVICE_FIELDS)
+_SERVICE_SPECS: Dict[Tuple[Tuple[str, str], ...], RecordSpec] = {SERVICE_FIELDS: SERVICE_SPEC}
+
+
+def _statement_rows(
+    stmt: ET.Element,
+    service_fields: Tuple[Tuple[str, str], ...],
+    extra: Dict[str, Any],
+) -> Iterator[Dict[str, Any]]:
+    spec = _SERVICE_SPECS.get(service_fields)
+    if spec is None:
+        spec = _SERVICE_SPECS[service_fields] = service_spec(service_fields)
+    return compile_spec(spec, namespace_of(stmt.tag)).rows(stmt, extra)
+
+
+_ACCOUNT = _qualify("t:account")[0]
+
+
+_COMPENSATION_CONTEXT_COMPILED = _compile_fields(COMPENSATION_CONTEXT_FIELDS)
+_COMPENSATION, _COMPENSATION_VALUE, _COMPENSATION_IDENTIFIER, _CURRENCY_TYPE, _AMOUNT, _CURRENCY = (
+    _qualify(p)[0]
+    for p in ("t:compensation", "t:compensationValue", "t:compensationIdentifier", "t:currencyType", "t:amount", "t:currency")
+)
+
+
+def _statement_compensations(stmt: ET.Element) -> Iterator[Dict[str, Any]]:
+    acc_el = stmt.find(_ACCOUNT)
+    if acc_el is None:
+        context = {name: None for name, _ in COMPENSATION_CONTEXT_FIELDS}
+    else:
+        acc_children = _children(acc_el)
+        context = {name: _resolve(acc_el, acc_children, q, path) for name, q, path in _COMPENSATION_CONTEXT_COMPILED}
+
+    for comp in stmt.iterfind(_COMPENSATION):
+        children = _children(comp)
+        # amount/currency come from the first <compensationValue> only
+        value = children.get(_COMPENSATION_VALUE)
+        value_children = _children(value) if value is not None else {}
+        yield {
+            **context,
+            "compensation_identifier": _text(children.get(_COMPENSATION_IDENTIFIER)),
+            "amount": _text(value_children.get(_AMOUNT)),
+            "currency": _text(value_children.get(_CURRENCY)),
+            "currency_type": _text(children.get(_CURRENCY_TYPE)),
+        }
+
+
+def _lxml_etree():
+    try:
+        # Optional: pip install lxml
+        from lxml import etree
+    except ImportError:
+        return None
+    return etree
+
+
+def _byte_source(source):
+    # lxml only reads bytes; a text file is read through its binary buffer
+    if isinstance(source, io.TextIOBase):
+        return getattr(source, "buffer", None)
+    return source
+
+
+def resolve_backend(backend: str, source) -> str:
+    """
+    "auto" -> "lxml" if lxml is importable and `source` is a path or has a byte buffer, else "etree".
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown TWIST backend: {backend}")
+    if backend == "etree":
+        return backend
+    usable = _lxml_etree() is not None and _byte_source(source) is not None
+    if backend == "lxml" and not usable:
+        if _lxml_etree() is None:
+            raise ImportError("backend='lxml' requires lxml (pip install lxml)")
+        raise TypeError("backend='lxml' needs a path or a binary file object")
+    return "lxml" if usable else "etree"
+
+
+def _iter_statements_etree(source, namespace: Optional[str]) -> Iterator[ET.Element]:
+    stack: List[ET.Element] = []
+    statement = est = None
+    if namespace is not None:
+        statement, est = _qualified(namespace, "statement"), _qualified(namespace, "electronicStatement")
+
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if not stack and statement is None:
+                root_ns = namespace_of(elem.tag)
+                statement, est = _qualified(root_ns, "statement"), _qualified(root_ns, "electronicStatement")
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        depth = len(stack)
+        if depth == 2 and elem.tag == statement and stack[1].tag == est:
+            yield elem
+            elem.clear()
+            stack[1].remove(elem)
+        elif depth == 1:
+            # header, electronicStatement (statementHeader etc.), anything else directly under the root
+            elem.clear()
+            stack[0].remove(elem)
+
+
+def _iter_statements_lxml(source, namespace: Optional[str]) -> Iterator[ET.Element]:
+    etree = _lxml_etree()
+    statement = est = None
+    if namespace:
+        statement, est = _qualified(namespace, "statement"), _qualified(namespace, "electronicStatement")
+    # libxml2 reports only </statement>; everything in between is never seen by Python
+    for _, elem in etree.iterparse(_byte_source(source), events=("end",), tag=statement or "{*}statement"):
+        parent = elem.getparent()
+        root = parent.getparent() if parent is not None else None
+        if root is None or root.getparent() is not None:
+            continue
+        if statement is None:
+            root_ns = namespace_of(root.tag) if namespace is None else namespace
+            statement, est = _qualified(root_ns, "statement"), _qualified(root_ns, "electronicStatement")
+        if elem.tag != statement or parent.tag != est:
+            continue
+        yield elem
+        elem.clear(keep_tail=True)
+        # drop the finished siblings (statementHeader, earlier statements, earlier top-level blocks)
+        while elem.getprevious() is not None:
+            del parent[0]
+        while parent.getprevious() is not None:
+            del root[0]
+
+
+def iter_statements(source, backend: str = "auto", namespace: Optional[str] = TWIST_NS) -> Iterator[ET.Element]:
+    """
+    Yields each root/electronicStatement/statement element once it is complete. The element is
+    cleared and detached when the generator resumes, so memory is bounded by the largest single
+    statement. With lxml, iterparse(tag=...) filters in C and only statements reach Python.
+
+    `namespace` is the TWIST namespace URI the tags must carry; "" matches unqualified tags and
+    None takes the namespace of the root element.
+    """
+    if resolve_backend(backend, source) == "lxml":
+        return _iter_statements_lxml(source, namespace)
+    return _iter_statements_etree(source, namespace)
+
+
+def iter_spec_rows(
+    source,
+    spec: RecordSpec,
+    extra: Optional[Dict[str, Any]] = None,
+    backend: str = "auto",
+    namespace: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the rows `spec` describes, statement by statement. The namespace defaults to the
+    root element's, and the spec is compiled once per namespace (compile_spec caches it).
+    """
+    extra = extra or {}
+    compiled = None
+    for stmt in iter_statements(source, backend, namespace):
+        ns = namespace_of(stmt.tag)
+        if compiled is None or compiled.namespace != ns:
+            compiled = compile_spec(spec, ns)
+        yield from compiled.rows(stmt, extra)
+
+
+class TwistFeedParser:
+    """
+    Push counterpart of iter_spec_rows for a TWIST document that arrives in pieces (an upload
+    body, a socket): feed(data) returns the rows of every statement that piece completed,
+    close() the rest and checks the document is well-formed. Built on ET.XMLPullParser, so
+    memory is bounded by the largest statement plus the unparsed tail of the last piece.
+    """
+
+    def __init__(
+        self,
+        spec: RecordSpec = SERVICE_SPEC,
+        extra: Optional[Dict[str, Any]] = None,
+        namespace: Optional[str] = None,
+    ):
+        self.spec = spec
+        self.extra = extra or {}
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._stack: List[ET.Element] = []
+        self._statement = self._est = None
+        if namespace is not None:
+            self._statement, self._est = _qualified(namespace, "statement"), _qualified(namespace, "electronicStatement")
+        self._compiled: Optional[CompiledSpec] = None
+
+    def _rows(self) -> List[Dict[str, Any]]:
+        # the stack handling of _iter_statements_etree, over the events of the pieces fed so far
+        out: List[Dict[str, Any]] = []
+        stack = self._stack
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                if not stack and self._statement is None:
+                    root_ns = namespace_of(elem.tag)
+                    self._statement, self._est = _qualified(root_ns, "statement"), _qualified(root_ns, "electronicStatement")
+                stack.append(elem)
+                continue
+
+            stack.pop()
+            depth = len(stack)
+            if depth == 2 and elem.tag == self._statement and stack[1].tag == self._est:
+                ns = namespace_of(elem.tag)
+                if self._compiled is None or self._compiled.namespace != ns:
+                    self._compiled = compile_spec(self.spec, ns)
+                out.extend(self._compiled.rows(elem, self.extra))
+                elem.clear()
+                stack[1].remove(elem)
+            elif depth == 1:
+                elem.clear()
+                stack[0].remove(elem)
+        return out
+
+    def feed(self, data) -> List[Dict[str, Any]]:
+        self._parser.feed(data)
+        return self._rows()
+
+    def close(self) -> List[Dict[str, Any]]:
+        self._parser.close()
+        return self._rows()
+
+
+def iter_service_rows(
+    source,
+    service_fields: Tuple[Tuple[str, str], ...] = SERVICE_FIELDS,
+    extra: Optional[Dict[str, Any]] = None,
+    backend: str = "auto",
+    namespace: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yields one dict per <service> (root/electronicStatement/statement/service) as each
+    </statement> closes, instead of building the whole tree first. `source` is a path or a
+    binary/text file object. `extra` is appended to every row (e.g. source_file_type).
+    TWIST 3.1 and namespace-less files are both read unless `namespace` pins one.
+    """
+    spec = _SERVICE_SPECS.get(service_fields)
+    if spec is None:
+        spec = _SERVICE_SPECS[service_fields] = service_spec(service_fields)
+    return iter_spec_rows(source, spec, extra, backend, namespace)
+
+
+def iter_compensations(source, backend: str = "auto") -> Iterator[Dict[str, Any]]:
+    """
+    Yields one dict per <compensation> with its statement's account context, in the
+    field order of twist_parser.CompensationRecord.
+    """
+    for stmt in iter_statements(source, backend):
+        yield from _statement_compensations(stmt)
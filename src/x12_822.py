@@ -0,0 +1,517 @@
+from __future__ import annotations
+
+from array import array
+from dataclasses import dataclass, field, fields
+from operator import attrgetter, itemgetter
+from sys import intern
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from src.x12_tokenizer import RawRef, Segment
+
+
+# -----------------------
+# Data Model
+# -----------------------
+@dataclass(slots=True)
+class Balance:
+    balance_type: Optional[str] = None
+    balance_code: Optional[str] = None
+    amount: Optional[str] = None
+    raw: Union[str, RawRef, None] = None
+
+
+@dataclass(slots=True)
+class ServiceCharge:
+    service_class: Optional[str] = None
+    service_code: Optional[str] = None
+    balance: Optional[str] = None
+    volume: Optional[str] = None
+    charge_amount: Optional[str] = None
+    rate: Optional[str] = None
+    unit: Optional[str] = None
+    description: Optional[str] = None
+    raw: Union[str, RawRef, None] = None
+
+
+@dataclass(frozen=True, slots=True)
+class Party:
+    entity_id_code: Optional[str] = None
+    name: Optional[str] = None
+    id_code_qual: Optional[str] = None
+    id_code: Optional[str] = None
+    raw: Union[str, RawRef, None] = None
+
+
+@dataclass(slots=True)
+class Account:
+    account_id: Optional[str] = None
+    account_desc: Optional[str] = None
+    currency: Optional[str] = None
+    ent: Optional[Tuple[str, ...]] = None
+    account_parent: Optional[str] = None
+    rates: Optional[str] = None
+    # header + ENT parties; one tuple shared by every account that saw the same N1 segments
+    parties: Tuple[Party, ...] = ()
+    balances: List[Balance] = field(default_factory=list)
+    service_charges: List[ServiceCharge] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Transaction822:
+    control_number: Optional[str] = None
+    bgn: Optional[Tuple[str, ...]] = None
+    dtm: List[Tuple[str, ...]] = field(default_factory=list)
+    accounts: List[Account] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Interchange:
+    isa: Optional[Tuple[str, ...]] = None
+    gs: Optional[Tuple[str, ...]] = None
+    transactions_822: List[Transaction822] = field(default_factory=list)
+    invoice_date: Optional[str] = None
+    from_date: Optional[str] = None
+    to_date: Optional[str] = None
+
+
+@dataclass(slots=True)
+class EDI822Document:
+    interchanges: List[Interchange] = field(default_factory=list)
+
+
+# -----------------------
+# Field layouts
+# -----------------------
+# element index per model field; -1 means "last element"
+STANDARD_LAYOUT: Dict[str, Dict[str, int]] = {
+    "SER": {
+        "service_class": 0,
+        "service_code": 1,
+        "balance": 2,
+        "charge_amount": 3,
+        "rate": 4,  # SER05, kept under the name the forked models used
+        "unit": 4,
+        "volume": 5,
+        "description": 6,
+    },
+    "BLN": {"balance_type": 0, "balance_code": 1, "amount": -1},
+    "ACT": {"account_id": 0, "account_desc": 1, "account_parent": 5},
+    "N1": {"entity_id_code": 0, "name": 1, "id_code_qual": 2, "id_code": 3},
+}
+
+# keyed by ISA06 (sender ID, trimmed); senders not listed use STANDARD_LAYOUT
+SENDER_LAYOUTS: Dict[str, Dict[str, Dict[str, int]]] = {
+    "JPMORGAN CHASE": STANDARD_LAYOUT,
+    "USBANK": STANDARD_LAYOUT,
+}
+
+DATE_QUALIFIERS = {"009": "invoice_date", "150": "from_date", "151": "to_date"}
+
+_NONE = (None,)
+
+
+def _compile_getter(
+    names: Tuple[str, ...],
+    mapping: Dict[str, int],
+    interned: Tuple[str, ...] = (),
+) -> Callable[[Tuple[str, ...]], Sequence[Any]]:
+    """
+    Turns {field: index} into one itemgetter over a padded element tuple, returning values in `names` order.
+    Slot 0 of the padded tuple is None, so unmapped and out-of-range fields cost nothing extra.
+    Fields listed in `interned` (codes and descriptions that repeat across accounts) are sys.intern'ed.
+    """
+    for name in mapping:
+        if name not in names:
+            raise ValueError(f"Unknown field in layout: {name}")
+    idx = [mapping.get(name) for name in names]
+    if any(i is not None and i < -1 for i in idx):
+        raise ValueError("Only -1 (last element) is supported as a negative index")
+
+    width = max((i + 1 for i in idx if i is not None and i >= 0), default=0)
+    pad = (None,) * width
+    positions = [0 if i is None else (-1 if i == -1 else i + 1) for i in idx]
+    getter = itemgetter(*positions)
+    if len(positions) == 1:
+        single = getter
+        getter = lambda seq: (single(seq),)
+
+    last = -1 in idx
+    if not interned:
+        if last:
+            return lambda el: getter(_NONE + el + pad + (el[-1:] or _NONE))
+        return lambda el: getter(_NONE + el + pad)
+
+    intern_at = tuple(names.index(name) for name in interned)
+
+    def pick_interned(el: Tuple[str, ...]) -> List[Any]:
+        v = list(getter(_NONE + el + pad + (el[-1:] or _NONE) if last else _NONE + el + pad))
+        for i in intern_at:
+            if v[i]:
+                v[i] = intern(v[i])
+        return v
+
+    return pick_interned
+
+
+_SER_FIELDS = tuple(f.name for f in fields(ServiceCharge) if f.name != "raw")
+_BLN_FIELDS = tuple(f.name for f in fields(Balance) if f.name != "raw")
+_ACT_FIELDS = ("account_id", "account_desc", "account_parent")
+_N1_FIELDS = ("entity_id_code", "name", "id_code_qual", "id_code")
+
+_SER_INTERNED = ("service_class", "service_code", "unit", "description")
+_BLN_INTERNED = ("balance_type", "balance_code")
+_ACT_INTERNED = ("account_desc", "account_parent")
+_N1_INTERNED = _N1_FIELDS
+
+
+class CompiledLayout:
+    __slots__ = ("ser", "bln", "act", "n1")
+
+    def __init__(self, layout: Dict[str, Dict[str, int]]):
+        self.ser = _compile_getter(_SER_FIELDS, layout["SER"], _SER_INTERNED)
+        self.bln = _compile_getter(_BLN_FIELDS, layout["BLN"], _BLN_INTERNED)
+        self.act = _compile_getter(_ACT_FIELDS, layout["ACT"], _ACT_INTERNED)
+        self.n1 = _compile_getter(_N1_FIELDS, layout["N1"], _N1_INTERNED)
+
+
+_COMPILED: Dict[str, CompiledLayout] = {}
+_STANDARD = CompiledLayout(STANDARD_LAYOUT)
+
+
+def register_layout(sender_id: str, layout: Dict[str, Dict[str, int]]) -> None:
+    """
+    Adds or replaces the layout for an ISA06 sender. Missing segment keys fall back to STANDARD_LAYOUT.
+    """
+    merged = {**STANDARD_LAYOUT, **layout}
+    CompiledLayout(merged)  # fail fast on a bad layout
+    SENDER_LAYOUTS[sender_id.strip()] = merged
+    _COMPILED.pop(sender_id.strip(), None)
+
+
+def layout_for(sender_id: Optional[str]) -> CompiledLayout:
+    key = (sender_id or "").strip()
+    compiled = _COMPILED.get(key)
+    if compiled is None:
+        layout = SENDER_LAYOUTS.get(key)
+        compiled = _STANDARD if layout is None or layout is STANDARD_LAYOUT else CompiledLayout(layout)
+        _COMPILED[key] = compiled
+    return compiled
+
+
+# -----------------------
+# Columnar output
+# -----------------------
+# output column -> attribute, same names and order as the list_account_services rows
+INTERCHANGE_COLUMNS = (("invoice_dt", "invoice_date"), ("from_dt", "from_date"), ("to_dt", "to_date"))
+ACCOUNT_COLUMNS = (
+    ("account_id", "account_id"),
+    ("account_description", "account_desc"),
+    ("currency", "currency"),
+    ("parent_account_id", "account_parent"),
+)
+SERVICE_COLUMNS = (
+    ("service_code", "service_code"),
+    ("service_description", "description"),
+    ("charge_amount", "charge_amount"),
+    ("volume", "volume"),
+    ("unit_price", "unit"),
+    ("balance", "balance"),
+)
+
+_SER_PICK = itemgetter(*(_SER_FIELDS.index(attr) for _, attr in SERVICE_COLUMNS))
+_SC_PICK = attrgetter(*(attr for _, attr in SERVICE_COLUMNS))
+_SERVICE_NAMES = tuple(col for col, _ in SERVICE_COLUMNS)
+
+
+class ServiceColumns:
+    """
+    Column-oriented list_account_services. Interchange and account fields are stored once per
+    object and referenced from each row by an int code; service fields are one list per column.
+    Values are read from the Interchange/Account when exported, so CUR or DTM arriving after
+    the first SER is still picked up.
+    """
+
+    __slots__ = ("source_file_type", "interchanges", "accounts", "ic_codes", "account_codes", "services")
+
+    def __init__(self, source_file_type: str = "EDI"):
+        self.source_file_type = source_file_type
+        self.interchanges: List[Interchange] = []
+        self.accounts: List[Account] = []
+        self.ic_codes = array("i")
+        self.account_codes = array("i")
+        self.services: Tuple[List[Optional[str]], ...] = tuple([] for _ in SERVICE_COLUMNS)
+
+    def __len__(self) -> int:
+        return len(self.ic_codes)
+
+    def _codes(self, ic: Interchange, account: Account) -> None:
+        if not self.interchanges or self.interchanges[-1] is not ic:
+            self.interchanges.append(ic)
+        if not self.accounts or self.accounts[-1] is not account:
+            self.accounts.append(account)
+        self.ic_codes.append(len(self.interchanges) - 1)
+        self.account_codes.append(len(self.accounts) - 1)
+
+    def append(self, ic: Interchange, account: Account, ser: Tuple[Optional[str], ...]) -> None:
+        """Adds one SER row from the values of a compiled SER layout."""
+        self._codes(ic, account)
+        for col, v in zip(self.services, _SER_PICK(ser)):
+            col.append(v)
+
+    def add_interchange(self, ic: Interchange) -> None:
+        """Adds the rows of an already built Interchange (e.g. one returned by a pool worker)."""
+        for tx in ic.transactions_822:
+            for acc in tx.accounts:
+                for sc in acc.service_charges:
+                    self._codes(ic, acc)
+                    for col, v in zip(self.services, _SC_PICK(sc)):
+                        col.append(v)
+
+    def _dictionaries(self) -> List[Tuple[str, List[Any], array]]:
+        out = []
+        for name, attr in INTERCHANGE_COLUMNS:
+            out.append((name, [getattr(ic, attr) for ic in self.interchanges], self.ic_codes))
+        for name, attr in ACCOUNT_COLUMNS:
+            out.append((name, [getattr(a, attr) for a in self.accounts], self.account_codes))
+        return out
+
+    def to_dict(self, numpy: bool = False) -> Dict[str, Any]:
+        """
+        Decoded dict-of-lists in list_account_services column order, or NumPy object arrays with numpy=True.
+        """
+        data: Dict[str, Any] = {}
+        for name, values, codes in self._dictionaries():
+            data[name] = [values[c] for c in codes]
+        for (name, _), col in zip(SERVICE_COLUMNS, self.services):
+            data[name] = col
+        data["source_file_type"] = [self.source_file_type] * len(self)
+        if numpy:
+            import numpy as np
+            data = {k: np.array(v, dtype=object) for k, v in data.items()}
+        return data
+
+    def to_frame(self):
+        """
+        pandas DataFrame with interchange/account columns and source_file_type as Categoricals.
+        """
+        # Requires: pip install pandas
+        import numpy as np
+        import pandas as pd
+
+        data: Dict[str, Any] = {}
+        for name, values, codes in self._dictionaries():
+            categories = list(dict.fromkeys(v for v in values if v is not None))
+            lookup = {v: i for i, v in enumerate(categories)}
+            remap = np.array([lookup.get(v, -1) for v in values], dtype=np.int32)
+            row_codes = remap[np.frombuffer(codes, dtype=np.int32)] if len(codes) else np.empty(0, dtype=np.int32)
+            data[name] = pd.Categorical.from_codes(row_codes, categories=categories)
+        for (name, _), col in zip(SERVICE_COLUMNS, self.services):
+            data[name] = col
+        data["source_file_type"] = pd.Categorical.from_codes(np.zeros(len(self), dtype=np.int8), categories=[self.source_file_type])
+        return pd.DataFrame(data)
+
+
+def service_rows(ic: Interchange, account: Account, source_file_type: str = "EDI") -> List[Dict[str, Any]]:
+    """The list_account_services rows of one account's service charges."""
+    head: Dict[str, Any] = {col: getattr(ic, attr) for col, attr in INTERCHANGE_COLUMNS}
+    for col, attr in ACCOUNT_COLUMNS:
+        head[col] = getattr(account, attr)
+    rows = []
+    for sc in account.service_charges:
+        row = dict(head)
+        row.update(zip(_SERVICE_NAMES, _SC_PICK(sc)))
+        row["source_file_type"] = source_file_type
+        rows.append(row)
+    return rows
+
+
+# -----------------------
+# 822 extraction
+# -----------------------
+class _State:
+    __slots__ = (
+        "ic", "tx", "ent", "account", "header_parties", "ent_parties", "parties", "layout", "handlers", "columns",
+        "on_complete",
+    )
+
+    def __init__(
+        self,
+        columns: Optional[ServiceColumns] = None,
+        on_complete: Optional[Callable[[Interchange, Any], None]] = None,
+    ):
+        self.ic = Interchange()
+        self.tx: Optional[Transaction822] = None
+        self.ent: Optional[Tuple[str, ...]] = None
+        self.account: Optional[Account] = None
+        self.header_parties: Tuple[Party, ...] = ()
+        self.ent_parties: Tuple[Party, ...] = ()
+        self.parties: Tuple[Party, ...] = ()  # header_parties + ent_parties, rebuilt only on N1/ENT
+        self.layout = _STANDARD
+        self.handlers = _ENVELOPE_HANDLERS
+        self.columns = columns
+        self.on_complete = on_complete
+
+
+def _current_account(st: _State) -> Account:
+    if st.account is None:
+        # create placeholder account if CUR/RTE/BLN/SER arrives before ACT
+        st.account = Account(ent=st.ent, parties=st.parties)
+        st.tx.accounts.append(st.account)
+    return st.account
+
+
+def _finish_account(st: _State) -> None:
+    # an account is complete once the next ACT/ENT/ST/SE arrives
+    if st.on_complete is not None and st.account is not None:
+        st.on_complete(st.ic, st.account)
+        st.account = None
+
+
+def _finish_transaction(st: _State) -> None:
+    _finish_account(st)
+    if st.on_complete is not None and st.tx is not None:
+        st.on_complete(st.ic, st.tx)
+        st.tx = None
+
+
+def _on_isa(st: _State, seg: Segment) -> None:
+    st.ic.isa = seg.elements
+    st.layout = layout_for(seg.elements[5] if len(seg.elements) > 5 else None)
+
+
+def _on_gs(st: _State, seg: Segment) -> None:
+    st.ic.gs = seg.elements
+
+
+def _on_st(st: _State, seg: Segment) -> None:
+    _finish_transaction(st)
+    el = seg.elements
+    st.ent = None
+    st.account = None
+    if len(el) > 0 and el[0] == "822":
+        st.tx = Transaction822(control_number=(el[1] if len(el) > 1 else None))
+        st.ic.transactions_822.append(st.tx)
+        st.header_parties = st.ent_parties = st.parties = ()
+        st.handlers = _TX_HANDLERS
+    else:
+        st.tx = None
+        st.handlers = _ENVELOPE_HANDLERS
+
+
+def _on_bgn(st: _State, seg: Segment) -> None:
+    st.tx.bgn = seg.elements
+
+
+def _on_dtm(st: _State, seg: Segment) -> None:
+    el = seg.elements
+    st.tx.dtm.append(el)
+    if len(el) > 1:
+        attr = DATE_QUALIFIERS.get(el[0])
+        if attr is not None:
+            setattr(st.ic, attr, el[1])
+
+
+def _on_n1(st: _State, seg: Segment) -> None:
+    party = Party(*st.layout.n1(seg.elements), raw=seg.raw)
+    # before ENT -> header, after ENT (before/after ACT) -> ent_parties
+    if st.ent is None:
+        st.header_parties += (party,)
+    else:
+        st.ent_parties += (party,)
+    st.parties = st.header_parties + st.ent_parties
+    # also attach to current account if one is active
+    if st.account is not None and st.ent is not None:
+        st.account.parties = st.parties
+
+
+def _on_ent(st: _State, seg: Segment) -> None:
+    _finish_account(st)
+    st.ent = seg.elements
+    st.ent_parties = ()
+    st.parties = st.header_parties
+    st.account = None  # next ACT starts a new account
+
+
+def _on_act(st: _State, seg: Segment) -> None:
+    _finish_account(st)
+    account_id, account_desc, account_parent = st.layout.act(seg.elements)
+    # parties collected so far (BK/AO etc.) are shared, not copied
+    a = Account(
+        ent=st.ent,
+        account_id=account_id,
+        account_desc=account_desc,
+        account_parent=account_parent,
+        parties=st.parties,
+    )
+    st.account = a
+    st.tx.accounts.append(a)
+
+
+def _on_cur(st: _State, seg: Segment) -> None:
+    a = _current_account(st)
+    a.currency = intern(seg.elements[1]) if len(seg.elements) > 1 else a.currency
+
+
+def _on_rte(st: _State, seg: Segment) -> None:
+    _current_account(st).rates = seg.elements[1] if len(seg.elements) > 1 else None
+
+
+def _on_bln(st: _State, seg: Segment) -> None:
+    _current_account(st).balances.append(Balance(*st.layout.bln(seg.elements), raw=seg.raw))
+
+
+def _on_ser(st: _State, seg: Segment) -> None:
+    if st.columns is not None:
+        st.columns.append(st.ic, _current_account(st), st.layout.ser(seg.elements))
+        return
+    _current_account(st).service_charges.append(ServiceCharge(*st.layout.ser(seg.elements), raw=seg.raw))
+
+
+def _on_se(st: _State, seg: Segment) -> None:
+    if st.on_complete is not None:
+        _finish_transaction(st)
+        st.handlers = _ENVELOPE_HANDLERS
+
+
+_ENVELOPE_HANDLERS: Dict[str, Callable[[_State, Segment], None]] = {
+    "ISA": _on_isa,
+    "GS": _on_gs,
+    "ST": _on_st,
+}
+
+# handlers while inside an 822 transaction set
+_TX_HANDLERS: Dict[str, Callable[[_State, Segment], None]] = {
+    **_ENVELOPE_HANDLERS,
+    "BGN": _on_bgn,
+    "DTM": _on_dtm,
+    "N1": _on_n1,
+    "ENT": _on_ent,
+    "ACT": _on_act,
+    "CUR": _on_cur,
+    "RTE": _on_rte,
+    "BLN": _on_bln,
+    "SER": _on_ser,
+    "SE": _on_se,
+}
+
+
+def extract_822(
+    segments: Iterable[Segment],
+    columns: Optional[ServiceColumns] = None,
+    on_complete: Optional[Callable[[Interchange, Any], None]] = None,
+) -> Interchange:
+    """
+    Maps one interchange's segments onto the 822 model. Each segment is a single lookup in the
+    handler table; SER/BLN/ACT/N1 positions come from the layout of the ISA06 sender.
+
+    With `columns`, SER rows go straight into the column arrays instead of Account.service_charges.
+    With `on_complete`, on_complete(interchange, obj) is called for each Account as soon as the
+    next ACT/ENT/SE closes it, and for each Transaction822 at its SE.
+    """
+    st = _State(columns, on_complete)
+    for seg in segments:
+        handler = st.handlers.get(seg.tag)
+        if handler is not None:
+            handler(st, seg)
+    _finish_transaction(st)
+    return st.ic
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import AsyncIterator, Callable, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_QUEUE_SIZE = 256
+
+
+class _Stopped(Exception):
+    """Raised inside the worker thread when the consumer has gone away."""
+
+
+class _Failed:
+    __slots__ = ("exc",)
+
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+_DONE = object()
+
+
+async def stream_from_thread(
+    produce: Callable[[Callable[[T], None]], None],
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+) -> AsyncIterator[T]:
+    """
+    Runs produce(emit) in a worker thread and yields every emitted item on the event loop.
+
+    The queue is bounded, so a slow consumer pauses the parser instead of buffering the file.
+    Exceptions from produce are re-raised here; leaving the `async for` early stops the worker
+    at its next emit.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(queue_size)
+    stop = threading.Event()
+
+    def put(item) -> None:
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+    def emit(item: T) -> None:
+        if stop.is_set():
+            raise _Stopped
+        put(item)
+
+    def run() -> None:
+        try:
+            produce(emit)
+        except _Stopped:
+            return
+        except BaseException as e:
+            if not stop.is_set():
+                put(_Failed(e))
+            return
+        if not stop.is_set():
+            put(_DONE)
+
+    worker = loop.run_in_executor(None, run)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            if isinstance(item, _Failed):
+                raise item.exc
+            yield item
+    finally:
+        stop.set()
+        # unblock a put that is waiting on a full queue, then let the thread finish
+        while not worker.done():
+            while not queue.empty():
+                queue.get_nowait()
+            await asyncio.wait({worker}, timeout=0.05)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator, Optional, Sequence
+
+from src.x12_tokenizer import Segment
+
+REQUIRED_SEGMENTS = ("ISA", "GS", "ST", "SE", "GE", "IEA")
+_ENVELOPE_TAGS = frozenset(REQUIRED_SEGMENTS)
+
+
+class X12EnvelopeError(ValueError):
+    """Raised when ISA/GS/ST envelopes do not match their trailers."""
+
+
+def _el(elements: Sequence[str], idx: int) -> Optional[str]:
+    if len(elements) <= idx:
+        return None
+    v = elements[idx].strip()
+    return v if v else None
+
+
+def _check_count(expected: Optional[str], actual: int, what: str) -> None:
+    try:
+        declared = int(expected) if expected is not None else None
+    except ValueError:
+        raise X12EnvelopeError(f"{what} is not numeric: {expected!r}") from None
+    if declared != actual:
+        raise X12EnvelopeError(f"{what} is {expected}, counted {actual}")
+
+
+class EnvelopeCheck:
+    """
+    The envelope rules of validate_interchange for one interchange, driven segment by segment:
+    check(seg, index) for each ISA/GS/ST/SE/GE/IEA segment, where index is the segment's
+    position in the interchange, then finish() after the last segment. Push parsers that
+    cannot hand over an iterable use it directly.
+    """
+
+    __slots__ = ("seen", "isa_control", "gs_control", "st_control", "st_index", "group_count", "tx_count")
+
+    def __init__(self):
+        self.seen = set()
+        self.isa_control: Optional[str] = None
+        self.gs_control: Optional[str] = None
+        self.st_control: Optional[str] = None
+        self.st_index = 0
+        self.group_count = 0
+        self.tx_count = 0
+
+    def check(self, seg: Segment, index: int) -> None:
+        tag = seg.tag
+        el = seg.elements
+        self.seen.add(tag)
+
+        if tag == "ISA":
+            if len(el) < 16:
+                raise X12EnvelopeError("Invalid ISA segment")
+            if not el[11].strip():
+                raise X12EnvelopeError("Failed to determine X12 version")
+            self.isa_control = _el(el, 12)
+            self.group_count = 0
+
+        elif tag == "GS":
+            if len(el) < 8:
+                raise X12EnvelopeError("Invalid GS segment")
+            self.gs_control = _el(el, 5)
+            self.group_count += 1
+            self.tx_count = 0
+
+        elif tag == "ST":
+            if len(el) < 2:
+                raise X12EnvelopeError("Invalid ST segment")
+            if self.st_control is not None:
+                raise X12EnvelopeError(f"ST {self.st_control} has no SE trailer")
+            self.st_control = _el(el, 1) or ""
+            self.tx_count += 1
+            self.st_index = index
+
+        elif tag == "SE":
+            if self.st_control is None:
+                raise X12EnvelopeError("SE without matching ST")
+            # SE01 counts ST through SE inclusive
+            _check_count(_el(el, 0), index - self.st_index + 1, f"SE01 for ST {self.st_control}")
+            if _el(el, 1) != self.st_control:
+                raise X12EnvelopeError(f"SE02 {_el(el, 1)} does not match ST02 {self.st_control}")
+            self.st_control = None
+
+        elif tag == "GE":
+            _check_count(_el(el, 0), self.tx_count, f"GE01 for GS {self.gs_control}")
+            if _el(el, 1) != self.gs_control:
+                raise X12EnvelopeError(f"GE02 {_el(el, 1)} does not match GS06 {self.gs_control}")
+            self.gs_control = None
+
+        elif tag == "IEA":
+            _check_count(_el(el, 0), self.group_count, f"IEA01 for ISA {self.isa_control}")
+            if _el(el, 1) != self.isa_control:
+                raise X12EnvelopeError(f"IEA02 {_el(el, 1)} does not match ISA13 {self.isa_control}")
+
+    def finish(self) -> None:
+        for tag in REQUIRED_SEGMENTS:
+            if tag not in self.seen:
+                raise X12EnvelopeError(f"Missing required segment: {tag}")
+
+
+def validate_interchange(segments: Iterable[Segment]) -> Iterator[Segment]:
+    """
+    Pass-through generator that checks the interchange envelope while segments flow to extract_822.
+
+    Covers what x12-edi-tools validated (ISA/GS/ST shape, required segments present) plus the
+    trailers: SE01 segment count and SE02, GE01 transaction count and GE02, IEA01 group count and IEA02.
+    """
+    envelope = EnvelopeCheck()
+    for index, seg in enumerate(segments):
+        if seg.tag in _ENVELOPE_TAGS:
+            envelope.check(seg, index)
+        yield seg
+    envelope.finish()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import codecs
+from typing import Any, Dict, List, Optional
+
+from src.x12_822 import Account, Interchange, _State, _finish_transaction, service_rows
+from src.x12_envelope import EnvelopeCheck, _ENVELOPE_TAGS
+from src.x12_tokenizer import Segment, SegmentScanner
+
+
+class EDI822FeedParser:
+    """
+    Push parser for 822 data that arrives in pieces (an upload body, a socket): feed(data)
+    returns the list_account_services rows of every account that piece completed, close()
+    the rest. An account is complete once the next ACT/ENT/SE arrives, so rows come out while
+    the upload is still running and only the open account is held.
+
+    Rows match parse_edi(engine="native"); with validate=True the envelope of every
+    interchange is checked as validate_interchange does, raising X12EnvelopeError at the
+    segment that breaks it. `data` may be bytes (decoded incrementally with `encoding`,
+    so a piece may end inside a character) or str.
+    """
+
+    def __init__(self, encoding: str = "utf-8", validate: bool = True, source_file_type: str = "EDI"):
+        self.validate = validate
+        self.source_file_type = source_file_type
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._scanner = SegmentScanner(raw="drop")
+        self._rows: List[Dict[str, Any]] = []
+        self._state: Optional[_State] = None
+        self._envelope: Optional[EnvelopeCheck] = None
+        self._index = 0
+        self._closed = False
+
+    def _complete(self, ic: Interchange, obj: Any) -> None:
+        if isinstance(obj, Account):
+            self._rows.extend(service_rows(ic, obj, self.source_file_type))
+
+    def _finish_interchange(self) -> None:
+        if self._state is None:
+            return
+        _finish_transaction(self._state)
+        if self._envelope is not None:
+            self._envelope.finish()
+        self._state = self._envelope = None
+
+    def _segments(self, segments: List[Segment]) -> None:
+        for seg in segments:
+            tag = seg.tag
+            if tag == "ISA" or self._state is None:
+                self._finish_interchange()
+                self._state = _State(on_complete=self._complete)
+                self._envelope = EnvelopeCheck() if self.validate else None
+                self._index = 0
+            st = self._state
+            if self._envelope is not None and tag in _ENVELOPE_TAGS:
+                self._envelope.check(seg, self._index)
+            self._index += 1
+            handler = st.handlers.get(tag)
+            if handler is not None:
+                handler(st, seg)
+
+    def _take(self) -> List[Dict[str, Any]]:
+        rows, self._rows = self._rows, []
+        return rows
+
+    def feed(self, data) -> List[Dict[str, Any]]:
+        if self._closed:
+            raise ValueError("feed() after close()")
+        text = self._decoder.decode(data) if isinstance(data, (bytes, bytearray, memoryview)) else data
+        self._segments(self._scanner.feed(text))
+        return self._take()
+
+    def close(self) -> List[Dict[str, Any]]:
+        if self._closed:
+            return []
+        self._closed = True
+        self._segments(self._scanner.feed(self._decoder.decode(b"", final=True)))
+        self._segments(self._scanner.close())
+        self._finish_interchange()
+        return self._take()
@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+import io
+import json
+import mmap
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from src.x12_822 import Interchange, extract_822
+from src.x12_tokenizer import _locate_isa_separators, iter_segments
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".idx"
+
+_INDEXED_TAGS = b"ISA|GS|ST|SE|GE|IEA|ENT|ACT"
+
+
+# -----------------------
+# Index entries
+# -----------------------
+class InterchangeEntry(NamedTuple):
+    control: Optional[str]  # ISA13
+    offset: int
+    isa_end: int
+    end: int
+
+
+class GroupEntry(NamedTuple):
+    offset: int
+    end: int
+    interchange: int
+
+
+class TransactionEntry(NamedTuple):
+    control: Optional[str]  # ST02
+    offset: int
+    header_end: int  # first ENT/ACT, i.e. BGN/DTM/N1 header only
+    end: int
+    group: int
+
+
+class AccountEntry(NamedTuple):
+    account_id: Optional[str]  # ACT01
+    offset: int
+    end: int
+    ent_offset: int  # -1 when the account has no ENT loop
+    ent_end: int
+    transaction: int
+
+
+# -----------------------
+# Byte scanner
+# -----------------------
+def _segment_pattern(prefix: bytes, element_sep: bytes, seg_term: bytes) -> "re.Pattern[bytes]":
+    # a single literal prefix byte keeps re on its fast search path; the optional whitespace
+    # after it covers interchanges appended after a newline ("...IEA*1*5~\nISA*...")
+    e, t = re.escape(element_sep), re.escape(seg_term)
+    value = b"([^" + e + t + b"]*)"
+    return re.compile(
+        re.escape(prefix) + b"[ \r\n]*(" + _INDEXED_TAGS + b")" + e + value + b"(?:" + e + value + b")?"
+    )
+
+
+def _isa_header(mm: mmap.mmap, pos: int) -> Tuple[bytes, bytes, Optional[str]]:
+    # ISA is fixed width, but 80-column files may wrap it: flatten before counting separators
+    flat = mm[pos:pos + 512].decode("latin-1").replace("\r", "").replace("\n", "")
+    element_sep, _, seg_term, _ = _locate_isa_separators(flat, 0)
+    parts = flat.split(element_sep)
+    control = (parts[13].strip() or None) if len(parts) > 13 else None
+    return element_sep.encode("latin-1"), seg_term.encode("latin-1"), control
+
+
+def _segment_prefix(mm: mmap.mmap, pos: int, seg_term: bytes) -> bytes:
+    """
+    Byte that precedes every segment: a newline for line-per-segment and fixed-record files,
+    otherwise the terminator itself.
+    """
+    j = mm.find(seg_term, pos) + 1
+    while j and mm[j:j + 1] in (b" ", b"\r"):
+        j += 1
+    return b"\n" if j and mm[j:j + 1] == b"\n" else seg_term
+
+
+def _follows_terminator(mm: mmap.mmap, pos: int, seg_term: bytes) -> bool:
+    # rejects a wrapped continuation line that happens to start like a segment tag
+    before = mm[max(0, pos - 256):pos].rstrip(b" \r\n")
+    return not before or before[-1:] == seg_term
+
+
+def _drop_blank_lines(mm: mmap.mmap, pos: int) -> int:
+    # blank lines between concatenated interchanges would break the fixed-record check of the slice
+    start = max(0, pos - 256)
+    end = start + len(mm[start:pos].rstrip(b"\r\n"))
+    if mm[end:end + 2] == b"\r\n":
+        return end + 2
+    return end + 1 if end < pos and mm[end:end + 1] == b"\n" else end
+
+
+def _value(raw: Optional[bytes]) -> Optional[str]:
+    if raw is None:
+        return None
+    v = raw.replace(b"\r", b"").replace(b"\n", b"").strip().decode("latin-1")
+    return v if v else None
+
+
+def _scan_offsets(mm: mmap.mmap) -> Iterator[Tuple[bytes, int, Optional[str], Optional[str]]]:
+    """
+    Yields (tag, offset, first element, second element) for every indexed segment, in file order.
+    For ISA the elements are (ISA13, None). Separators are re-read from each ISA.
+    """
+    pos = mm.find(b"ISA")
+    while pos != -1:
+        element_sep, seg_term, control = _isa_header(mm, pos)
+        yield b"ISA", pos, control, None
+        prefix = _segment_prefix(mm, pos, seg_term)
+        pattern = _segment_pattern(prefix, element_sep, seg_term)
+        next_isa = -1
+        for m in pattern.finditer(mm, pos + 3):
+            start = m.start(1)
+            if prefix != seg_term and not _follows_terminator(mm, start, seg_term):
+                continue
+            tag = m.group(1)
+            if tag == b"ISA":
+                next_seps = _isa_header(mm, start)
+                if next_seps[:2] != (element_sep, seg_term) or _segment_prefix(mm, start, seg_term) != prefix:
+                    # separators or layout change: restart the scan with a new pattern
+                    next_isa = start
+                    break
+                yield tag, start, next_seps[2], None
+                continue
+            yield tag, start, _value(m.group(2)), _value(m.group(3))
+        pos = next_isa
+
+
+# -----------------------
+# Index
+# -----------------------
+def sidecar_path(path: Union[str, Path]) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+class OffsetIndex:
+    """
+    Byte offsets of the ISA/GS/ST/ENT/ACT segments of one 822 file.
+
+    Lookups read and parse only the slices they need (the ISA, GS and ST header plus the
+    ENT and ACT loop for an account), so one account in a multi-GB file costs milliseconds.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        interchanges: List[InterchangeEntry],
+        groups: List[GroupEntry],
+        transactions: List[TransactionEntry],
+        accounts: List[AccountEntry],
+        source_size: int = -1,
+        source_mtime_ns: int = -1,
+    ):
+        self.path = Path(path)
+        self.interchanges = interchanges
+        self.groups = groups
+        self.transactions = transactions
+        self.accounts = accounts
+        self.source_size = source_size
+        self.source_mtime_ns = source_mtime_ns
+        self._by_control: Optional[Dict[str, List[int]]] = None
+        self._by_account: Optional[Dict[str, List[int]]] = None
+
+    # ---- persistence ----
+    def is_current(self) -> bool:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return False
+        return stat.st_size == self.source_size and stat.st_mtime_ns == self.source_mtime_ns
+
+    def save(self, sidecar: Optional[Union[str, Path]] = None) -> Path:
+        sidecar = Path(sidecar) if sidecar is not None else sidecar_path(self.path)
+        payload = {
+            "version": INDEX_VERSION,
+            "source_size": self.source_size,
+            "source_mtime_ns": self.source_mtime_ns,
+            "interchanges": self.interchanges,
+            "groups": self.groups,
+            "transactions": self.transactions,
+            "accounts": self.accounts,
+        }
+        tmp = sidecar.with_name(sidecar.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp, sidecar)
+        return sidecar
+
+    @classmethod
+    def load(cls, path: Union[str, Path], sidecar: Optional[Union[str, Path]] = None) -> "OffsetIndex":
+        sidecar = Path(sidecar) if sidecar is not None else sidecar_path(path)
+        with open(sidecar, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported index version in {sidecar}: {payload.get('version')}")
+        return cls(
+            path,
+            [InterchangeEntry(*e) for e in payload["interchanges"]],
+            [GroupEntry(*e) for e in payload["groups"]],
+            [TransactionEntry(*e) for e in payload["transactions"]],
+            [AccountEntry(*e) for e in payload["accounts"]],
+            payload["source_size"],
+            payload["source_mtime_ns"],
+        )
+
+    # ---- lookups ----
+    def transaction_positions(self, control: str) -> List[int]:
+        if self._by_control is None:
+            self._by_control = {}
+            for i, tx in enumerate(self.transactions):
+                self._by_control.setdefault(tx.control, []).append(i)
+        return self._by_control.get(control, [])
+
+    def account_positions(self, account_id: str) -> List[int]:
+        if self._by_account is None:
+            self._by_account = {}
+            for i, acc in enumerate(self.accounts):
+                self._by_account.setdefault(acc.account_id, []).append(i)
+        return self._by_account.get(account_id, [])
+
+    def _envelope_slices(self, tx: TransactionEntry) -> List[Tuple[int, int]]:
+        group = self.groups[tx.group]
+        ic = self.interchanges[group.interchange]
+        return [(ic.offset, ic.isa_end), (group.offset, group.end)]
+
+    def _parse(self, slices: List[Tuple[int, int]], encoding: str) -> Interchange:
+        with open(self.path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = "".join(mm[a:b].decode(encoding) for a, b in slices)
+        return extract_822(iter_segments(io.StringIO(text)))
+
+    def read_interchange(self, position: int, encoding: str = "utf-8") -> Interchange:
+        ic = self.interchanges[position]
+        return self._parse([(ic.offset, ic.end)], encoding)
+
+    def read_transaction(self, control: str, encoding: str = "utf-8") -> List[Interchange]:
+        """
+        One Interchange per ST whose ST02 is `control` (ST02 is only unique inside a group).
+        """
+        out = []
+        for i in self.transaction_positions(control):
+            tx = self.transactions[i]
+            out.append(self._parse(self._envelope_slices(tx) + [(tx.offset, tx.end)], encoding))
+        return out
+
+    def read_account(self, account_id: str, encoding: str = "utf-8") -> List[Interchange]:
+        """
+        One Interchange per ACT loop for `account_id`, holding just that account with its
+        transaction header (dates, N1 parties) and ENT context.
+        """
+        out = []
+        for i in self.account_positions(account_id):
+            acc = self.accounts[i]
+            tx = self.transactions[acc.transaction]
+            slices = self._envelope_slices(tx) + [(tx.offset, tx.header_end)]
+            if acc.ent_offset >= 0:
+                slices.append((acc.ent_offset, acc.ent_end))
+            slices.append((acc.offset, acc.end))
+            ic = self._parse(slices, encoding)
+            for parsed in ic.transactions_822:
+                # header-level RTE/BLN open a placeholder account; the ACT loop is always last
+                del parsed.accounts[:-1]
+            out.append(ic)
+        return out
+
+
+def build_index(path: Union[str, Path]) -> OffsetIndex:
+    """
+    Scans the raw bytes through mmap (no decoding, no segment splitting) and records the offsets.
+    """
+    path = Path(path)
+    stat = path.stat()
+    interchanges: List[list] = []
+    groups: List[list] = []
+    transactions: List[list] = []
+    accounts: List[list] = []
+
+    if stat.st_size:
+        with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # (entry, field) pairs that end where the next indexed segment starts
+            open_ends: List[Tuple[list, int]] = []
+            tx: Optional[list] = None
+            ent: Optional[list] = None
+            acc: Optional[list] = None
+
+            for tag, start, v1, v2 in _scan_offsets(mm):
+                for entry, idx in open_ends:
+                    entry[idx] = start
+                open_ends.clear()
+
+                if tag in (b"ISA", b"ST"):
+                    # ST without SE: close what is still open at the next envelope
+                    if acc is not None:
+                        acc[2] = start
+                    if tx is not None:
+                        tx[3] = start
+
+                if tag == b"ISA":
+                    if interchanges:
+                        interchanges[-1][3] = _drop_blank_lines(mm, start)
+                    interchanges.append([v1, start, start, start])
+                    open_ends.append((interchanges[-1], 2))
+                    tx = ent = acc = None
+                elif tag == b"GS":
+                    groups.append([start, start, len(interchanges) - 1])
+                    open_ends.append((groups[-1], 1))
+                elif tag == b"ST":
+                    tx = [v2, start, -1, start, len(groups) - 1]
+                    transactions.append(tx)
+                    ent = acc = None
+                elif tag in (b"ENT", b"ACT", b"SE") and tx is not None:
+                    if tx[2] == -1:
+                        tx[2] = start
+                    if acc is not None:
+                        acc[2] = start
+                        acc = None
+                    if tag == b"ENT":
+                        ent = [start, start]
+                        open_ends.append((ent, 1))
+                    elif tag == b"ACT":
+                        ent_offset, ent_end = ent if ent is not None else (-1, -1)
+                        acc = [v1, start, start, ent_offset, ent_end, len(transactions) - 1]
+                        accounts.append(acc)
+                    else:
+                        open_ends.append((tx, 3))
+                        tx = ent = None
+
+            end = len(mm)
+            for entry, idx in open_ends:
+                entry[idx] = end
+            if acc is not None:
+                acc[2] = end
+            if tx is not None:
+                tx[3] = end
+            if interchanges:
+                interchanges[-1][3] = end
+
+    return OffsetIndex(
+        path,
+        [InterchangeEntry(*e) for e in interchanges],
+        [GroupEntry(*e) for e in groups],
+        [TransactionEntry(*e) for e in transactions],
+        [AccountEntry(*e) for e in accounts],
+        stat.st_size,
+        stat.st_mtime_ns,
+    )
+
+
+def open_index(path: Union[str, Path], rebuild: bool = False) -> OffsetIndex:
+    """
+    Loads the sidecar index next to `path`, building and saving it when missing or stale.
+    When the sidecar cannot be written, the freshly built index is returned unsaved.
+    """
+    sidecar = sidecar_path(path)
+    if not rebuild and sidecar.exists():
+        try:
+            index = OffsetIndex.load(path, sidecar)
+        except (ValueError, KeyError, TypeError):
+            index = None
+        if index is not None and index.is_current():
+            return index
+    index = build_index(path)
+    try:
+        index.save(sidecar)
+    except OSError:
+        # read-only directory (archive mount, shared drop): use the index without persisting it
+        pass
+    return index
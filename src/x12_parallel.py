@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def _run_batch(fn: Callable[[T], R], batch: List[T]) -> List[R]:
+    return [fn(item) for item in batch]
+
+
+def parallel_map_ordered(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    workers: Optional[int] = None,
+    chunksize: int = 1,
+) -> Iterator[R]:
+    """
+    Runs fn over items in a ProcessPoolExecutor and yields results in input order.
+
+    items are sent in batches of `chunksize`, and at most two batches per worker are in
+    flight, so a streaming source (iter_interchange_texts) is never read far ahead.
+    fn must be a module-level function (or functools.partial of one) so it can be pickled.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    if chunksize < 1:
+        raise ValueError("chunksize must be >= 1")
+
+    it = iter(items)
+    if workers == 1:
+        for item in it:
+            yield fn(item)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        while True:
+            while len(pending) < workers * 2:
+                batch = list(islice(it, chunksize))
+                if not batch:
+                    break
+                pending.append(pool.submit(_run_batch, fn, batch))
+            if not pending:
+                return
+            yield from pending.popleft().result()
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from array import array
+from operator import attrgetter
+from typing import Iterable, List, Optional
+
+from src.x12_822 import EDI822Document, Interchange
+
+# BLN02 code carrying the account's total service charges (JPMC and USBANK both report it)
+SERVICE_CHARGE_TOTAL = "000331"
+
+DISCREPANCY_COLUMNS = (
+    "level",
+    "interchange",
+    "transaction",
+    "account_id",
+    "balance_code",
+    "reported",
+    "charged",
+    "variance",
+    "services",
+    "bad_amounts",
+    "status",
+)
+
+_CHARGE = attrgetter("charge_amount")
+
+
+def _to_float(values: List[Optional[str]]):
+    """
+    Amount strings -> (float array, bad mask). None / "" count as 0; anything non-numeric is flagged bad.
+    """
+    import numpy as np
+    import pandas as pd
+
+    try:
+        # C-level float() over the whole list; None becomes NaN
+        num = np.array(values, dtype=np.float64)
+    except ValueError:
+        # a blank or malformed amount somewhere: coerce per value instead
+        num = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(dtype=np.float64, copy=True)
+    missing = np.flatnonzero(np.isnan(num))
+    bad = np.zeros(len(num), dtype=bool)
+    # only the few NaN positions need a look at the original string
+    bad[missing] = [bool(values[i] and values[i].strip()) for i in missing]
+    num[missing] = 0.0
+    return num, bad
+
+
+def reconcile_822(
+    interchanges: Iterable[Interchange],
+    balance_code: str = SERVICE_CHARGE_TOTAL,
+    tolerance: float = 0.005,
+    all_rows: bool = False,
+):
+    """
+    Checks the SER charge amounts of every account against its BLN `balance_code` total, and the
+    same sums per transaction set. One pass collects the amount strings with int account/transaction
+    codes; conversion and the per-group sums are done on whole columns (pd.to_numeric, np.bincount).
+
+    Returns a DataFrame with DISCREPANCY_COLUMNS: one "account" row per account that has SER or the
+    BLN total, one "transaction" row per ST totalled over its accounts with the BLN total. status
+    is "ok", "mismatch" (|variance| > tolerance), "missing_balance" (SER but no BLN total) or
+    "bad_amount" (a non-numeric amount). Only rows that are not "ok" are returned unless
+    all_rows=True. Accounts must carry their service_charges, i.e. the document was not parsed
+    into ServiceColumns.
+    """
+    # Requires: pip install pandas
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(interchanges, EDI822Document):
+        interchanges = interchanges.interchanges
+
+    tx_keys: List[tuple] = []
+    account_ids: List[Optional[str]] = []
+    account_tx = array("i")
+    bln_account = array("i")
+    bln_amounts: List[Optional[str]] = []
+    ser_account = array("i")
+    ser_amounts: List[Optional[str]] = []
+
+    for ic in interchanges:
+        isa13 = ic.isa[12].strip() if ic.isa and len(ic.isa) > 12 else None
+        for tx in ic.transactions_822:
+            t = len(tx_keys)
+            tx_keys.append((isa13, tx.control_number))
+            for acc in tx.accounts:
+                a = len(account_ids)
+                account_ids.append(acc.account_id)
+                account_tx.append(t)
+                for b in acc.balances:
+                    if b.balance_code == balance_code:
+                        bln_account.append(a)
+                        bln_amounts.append(b.amount)
+                ser_amounts.extend(map(_CHARGE, acc.service_charges))
+                ser_account.extend([a] * len(acc.service_charges))
+
+    n_acc = len(account_ids)
+    n_tx = len(tx_keys)
+    bln_idx = np.frombuffer(bln_account, dtype=np.int32) if len(bln_account) else np.empty(0, dtype=np.int32)
+    ser_idx = np.frombuffer(ser_account, dtype=np.int32) if len(ser_account) else np.empty(0, dtype=np.int32)
+    acc_tx = np.frombuffer(account_tx, dtype=np.int32) if len(account_tx) else np.empty(0, dtype=np.int32)
+
+    bln_num, bln_bad = _to_float(bln_amounts)
+    ser_num, ser_bad = _to_float(ser_amounts)
+
+    reported = np.bincount(bln_idx, weights=bln_num, minlength=n_acc)
+    has_reported = np.bincount(bln_idx, minlength=n_acc) > 0
+    charged = np.bincount(ser_idx, weights=ser_num, minlength=n_acc)
+    services = np.bincount(ser_idx, minlength=n_acc)
+    bad = np.bincount(bln_idx, weights=bln_bad, minlength=n_acc) + np.bincount(ser_idx, weights=ser_bad, minlength=n_acc)
+
+    keep = has_reported | (services > 0)
+    acc_frame = _frame(
+        "account",
+        [tx_keys[t] for t in acc_tx[keep]],
+        np.array(account_ids, dtype=object)[keep],
+        balance_code,
+        np.where(has_reported, reported, np.nan)[keep],
+        charged[keep],
+        services[keep],
+        bad[keep],
+        tolerance,
+    )
+
+    # transaction totals over the accounts that report the BLN total: a SER-only account is already
+    # "missing_balance" at account level and would otherwise show up as a transaction variance.
+    # A transaction with no BLN at all keeps every account's charges.
+    tx_reported = np.bincount(acc_tx[has_reported], weights=reported[has_reported], minlength=n_tx)
+    tx_has_reported = np.bincount(acc_tx[has_reported], minlength=n_tx) > 0
+    tx_charged = np.bincount(acc_tx[has_reported], weights=charged[has_reported], minlength=n_tx)
+    tx_services = np.bincount(acc_tx[has_reported], weights=services[has_reported], minlength=n_tx)
+    tx_bad = np.bincount(acc_tx[has_reported], weights=bad[has_reported], minlength=n_tx)
+    tx_frame = _frame(
+        "transaction",
+        tx_keys,
+        np.full(n_tx, None, dtype=object),
+        balance_code,
+        np.where(tx_has_reported, tx_reported, np.nan),
+        np.where(tx_has_reported, tx_charged, np.bincount(acc_tx, weights=charged, minlength=n_tx)),
+        np.where(tx_has_reported, tx_services, np.bincount(acc_tx, weights=services, minlength=n_tx)).astype(np.int64),
+        np.where(tx_has_reported, tx_bad, np.bincount(acc_tx, weights=bad, minlength=n_tx)),
+        tolerance,
+    )
+
+    out = pd.concat([acc_frame, tx_frame], ignore_index=True)
+    if not all_rows:
+        out = out[out["status"] != "ok"].reset_index(drop=True)
+    return out
+
+
+def _frame(level, keys, account_ids, balance_code, reported, charged, services, bad, tolerance):
+    import numpy as np
+    import pandas as pd
+
+    variance = np.round(reported - charged, 2)
+    status = np.select(
+        [bad > 0, np.isnan(reported), np.abs(variance) > tolerance],
+        ["bad_amount", "missing_balance", "mismatch"],
+        default="ok",
+    )
+    return pd.DataFrame(
+        {
+            "level": level,
+            "interchange": [k[0] for k in keys],
+            "transaction": [k[1] for k in keys],
+            "account_id": account_ids,
+            "balance_code": balance_code,
+            "reported": np.round(reported, 2),
+            "charged": np.round(charged, 2),
+            "variance": variance,
+            "services": services.astype(np.int64),
+            "bad_amounts": bad.astype(np.int64),
+            "status": status,
+        },
+        columns=list(DISCREPANCY_COLUMNS),
+    )
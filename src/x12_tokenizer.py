@@ -0,0 +1,568 @@
+from __future__ import annotations
+
+import mmap
+import re
+from typing import Iterator, List, NamedTuple, Optional, TextIO, Tuple, Union
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+RAW_MODES = ("keep", "lazy", "drop")
+
+
+class MappedSource:
+    """
+    Memory-mapped EDI file that the tokenizer reads like a text stream. Needed for raw="lazy":
+    segment offsets are byte offsets into this map. X12 text is ASCII, so bytes == characters.
+    """
+
+    __slots__ = ("path", "data", "_pos")
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as fh:
+            # the map keeps its own handle; an empty file cannot be mapped
+            self.data: Union[mmap.mmap, bytes] = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) if fh.seek(0, 2) else b""
+        self._pos = 0
+
+    def read(self, size: int = -1) -> str:
+        end = len(self.data) if size is None or size < 0 else self._pos + size
+        chunk = self.data[self._pos:end]
+        self._pos += len(chunk)
+        try:
+            return chunk.decode("ascii")
+        except UnicodeDecodeError:
+            raise ValueError(f"raw='lazy' needs an ASCII EDI file: {self.path}") from None
+
+
+class _RawSource:
+    __slots__ = ("data", "seg_term")
+
+    def __init__(self, data: Union[mmap.mmap, bytes], seg_term: str):
+        self.data = data
+        self.seg_term = seg_term.encode("ascii")
+
+
+class RawRef(int):
+    """
+    Raw segment text kept as its byte offset in a MappedSource and decoded only when read
+    (str(ref) / ref.text). The map lives on a per-source subclass (_raw_ref_type), so each
+    reference is a bare int. Copies and pickles as the plain string, so asdict() and process
+    pools see the same values as raw="keep".
+    """
+
+    __slots__ = ()
+    source: _RawSource
+
+    @property
+    def text(self) -> str:
+        data = self.source.data
+        offset = int(self)
+        end = data.find(self.source.seg_term, offset)
+        raw = data[offset:end if end != -1 else len(data)].decode("ascii")
+        # fixed-record files: drop the record breaks inside the segment, like the unwrapping reader
+        return raw.replace("\r", "").replace("\n", "").rstrip()
+
+    def __str__(self) -> str:
+        return self.text
+
+    __format__ = object.__format__
+
+    def __repr__(self) -> str:
+        return repr(self.text)
+
+    def __bool__(self) -> bool:
+        return True
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, RawRef):
+            other = other.text
+        return self.text == other
+
+    def __ne__(self, other) -> bool:
+        return not self == other
+
+    __hash__ = None
+
+    def __deepcopy__(self, memo) -> str:
+        return self.text
+
+    def __reduce__(self):
+        return str, (self.text,)
+
+
+def _raw_ref_type(data: Union[mmap.mmap, bytes], seg_term: str) -> type:
+    return type("RawRef", (RawRef,), {"__slots__": (), "source": _RawSource(data, seg_term)})
+
+
+class Segment(NamedTuple):
+    """
+    Compact segment record: a tuple, so no per-segment dict or __dict__.
+    raw is a str, a RawRef (raw="lazy") or None (raw="drop").
+    """
+    tag: str
+    elements: Tuple[str, ...]
+    raw: Union[str, RawRef, None]
+
+
+# -----------------------
+# Separator detection
+# -----------------------
+def _locate_isa_separators(text: str, isa_pos: int) -> Tuple[str, str, str, int]:
+    """
+    Same rules as detect_separators_from_isa, but also returns the position of the ISA terminator.
+    """
+    if isa_pos < 0 or isa_pos + 4 > len(text):
+        raise ValueError("Invalid ISA position for separator detection")
+
+    element_sep = text[isa_pos + 3]
+
+    # Find 16th occurrence of element_sep after 'ISA'
+    count = 0
+    i = isa_pos
+    last_sep_pos = -1
+    while count < 16:
+        j = text.find(element_sep, i + 1)
+        if j == -1:
+            raise ValueError("Could not find 16 element separators inside ISA")
+        last_sep_pos = j
+        i = j
+        count += 1
+
+    if last_sep_pos + 2 >= len(text):
+        raise ValueError("ISA is truncated; cannot read component separator and terminator")
+
+    component_sep = text[last_sep_pos + 1]
+    seg_term = text[last_sep_pos + 2]
+    return element_sep, component_sep, seg_term, last_sep_pos + 2
+
+
+def detect_separators_from_isa(text: str, isa_pos: int) -> Tuple[str, str, str]:
+    """
+    Element separators can be * or |. This detects the separator in the ISA segment
+    """
+    element_sep, component_sep, seg_term, _ = _locate_isa_separators(text, isa_pos)
+    return element_sep, component_sep, seg_term
+
+
+def _starts_isa(raw_seg: str) -> bool:
+    return raw_seg.startswith("ISA") and len(raw_seg) > 3 and not raw_seg[3].isalnum()
+
+
+# -----------------------
+# Fixed-length record unwrapping
+# -----------------------
+class _PrefixedReader:
+    """
+    Serves `head` first, then the rest of `stream`. Used after peeking at the first chunk.
+    """
+
+    def __init__(self, head: str, stream: TextIO):
+        self._head = head
+        self._stream = stream
+
+    def read(self, size: int = -1) -> str:
+        if self._head:
+            out, self._head = self._head, ""
+            return out
+        return self._stream.read(size)
+
+
+class FixedRecordReader:
+    """
+    File-like wrapper that undoes fixed-length record wrapping (80-column mainframe feeds).
+
+    Record breaks are dropped and the space padding after a segment terminator is cut, so a
+    SER description broken across two records ("...PAYMENT-PAYMENT" / "US**B") reads as one segment.
+    Works on whole records per read; only a partial trailing record is carried over.
+    """
+
+    def __init__(self, head: str, stream: TextIO, seg_term: str):
+        self._stream = stream
+        self._carry = head
+        self._eof = False
+        self._term = seg_term
+        self._pad = re.compile(re.escape(seg_term) + r" *\r?\n")
+        # a callable replacement, since "\\" is a common terminator and not a valid template
+        self._keep_term = lambda _m: seg_term
+
+    def _unwrap(self, text: str) -> str:
+        return self._pad.sub(self._keep_term, text).replace("\r\n", "").replace("\n", "")
+
+    def read(self, size: int = -1) -> str:
+        while not self._eof:
+            chunk = self._stream.read(size)
+            if not chunk or size is None or size < 0:
+                self._eof = True
+            text = self._carry + chunk
+            cut = text.rfind("\n") + 1
+            if self._eof:
+                cut = len(text)
+            self._carry = text[cut:]
+            if cut:
+                return self._unwrap(text[:cut])
+        out, self._carry = self._carry, ""
+        if out:
+            out = self._unwrap(out)
+            if out.rstrip(" ").endswith(self._term):
+                out = out.rstrip(" ")
+        return out
+
+
+_RECORD_PEEK = 8192
+
+
+def _record_length(head: str) -> Optional[int]:
+    """
+    Length of the fixed records in `head`, or None if the lines are not all the same length.
+    """
+    lines = head.split("\n")[:-1]
+    if len(lines) < 2:
+        return None
+    width = len(lines[0].rstrip("\r"))
+    if width == 0 or any(len(line.rstrip("\r")) != width for line in lines):
+        return None
+    return width
+
+
+def unwrap_fixed_records(stream: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> TextIO:
+    """
+    Peeks at the first chunk and, if the file is made of fixed-length lines, returns a
+    FixedRecordReader over it. Single-line feeds (and feeds whose segment terminator is
+    itself a newline) come back unchanged apart from the replayed first chunk.
+    """
+    # a few KB is enough to see several records; the partial last line is ignored
+    head = stream.read(max(chunk_size, _RECORD_PEEK))
+
+    if _record_length(head) is not None:
+        flat = head.replace("\r", "").replace("\n", "")
+        isa_pos = flat.find("ISA")
+        try:
+            _, _, seg_term, _ = _locate_isa_separators(flat, isa_pos)
+        except ValueError:
+            seg_term = None
+        if seg_term is not None and seg_term not in "\r\n":
+            return FixedRecordReader(head, stream, seg_term)
+
+    return _PrefixedReader(head, stream)
+
+
+# -----------------------
+# Chunked scanner
+# -----------------------
+def _scan(stream: TextIO, chunk_size: int, unwrap: bool = True) -> Iterator[Tuple[List[str], str, str, int]]:
+    """
+    Reads the stream chunk by chunk and yields batches of (raw_segments, element_sep, seg_term, offset),
+    where offset is the stream position of the first raw segment.
+
+    raw_segments are the untouched texts between two terminators. Separators are detected
+    from every ISA header, text between IEA and the next ISA is skipped, and only the
+    current chunk is kept in memory between reads. Fixed-length record files are
+    unwrapped on the way in (unwrap_fixed_records) unless unwrap=False.
+    """
+    if unwrap:
+        stream = unwrap_fixed_records(stream, chunk_size)
+    buf = ""
+    pos = 0
+    base = 0  # stream offset of buf[0]
+    eof = False
+    element_sep: Optional[str] = None
+    seg_term: Optional[str] = None
+
+    while True:
+        if seg_term is None:
+            # header mode: look for the next ISA and read its separators
+            i = buf.find("ISA", pos)
+            if i == -1:
+                if eof:
+                    return
+                # keep a possible partial "IS" across the chunk boundary
+                pos = max(pos, len(buf) - 2)
+            else:
+                pos = i
+                try:
+                    element_sep, _, seg_term, term_pos = _locate_isa_separators(buf, i)
+                except ValueError:
+                    if eof:
+                        raise
+                else:
+                    yield [buf[i:term_pos]], element_sep, seg_term, base + i
+                    pos = term_pos + 1
+                    continue
+        else:
+            last = buf.rfind(seg_term, pos)
+            if last != -1:
+                # bulk-split everything up to the first segment that may open or close an envelope
+                isa = buf.find("ISA", pos, last)
+                iea = buf.find("IEA", pos, last)
+                marker = min(isa, iea) if isa != -1 and iea != -1 else max(isa, iea)
+                end = last if marker == -1 else buf.rfind(seg_term, pos, marker)
+                if end != -1:
+                    yield buf[pos:end].split(seg_term), element_sep, seg_term, base + pos
+                    pos = end + 1
+                    continue
+
+            if last != -1 or eof:
+                j = buf.find(seg_term, pos)
+                raw_seg = buf[pos:j] if j != -1 else buf[pos:]
+                stripped = raw_seg.lstrip()
+                if _starts_isa(stripped):
+                    # next interchange without IEA: re-detect, separators may differ
+                    pos += len(raw_seg) - len(stripped)
+                    seg_term = None
+                    continue
+                if j == -1:
+                    # unterminated tail at end of file
+                    if stripped:
+                        yield [raw_seg], element_sep, "", base + pos
+                    return
+                start = base + pos
+                pos = j + 1
+                yield [raw_seg], element_sep, seg_term, start
+                if stripped[:3] == "IEA" and stripped[3:4] == element_sep:
+                    seg_term = None
+                continue
+
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+        base += pos
+        buf = buf[pos:] + chunk
+        pos = 0
+
+
+# -----------------------
+# Public API
+# -----------------------
+def iter_segments(stream: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE, raw: str = "keep") -> Iterator[Segment]:
+    """
+    Yields Segment records one at a time, in file order, across all interchanges.
+
+    raw="drop" leaves Segment.raw as None. raw="lazy" needs a MappedSource and sets Segment.raw
+    to a RawRef (an offset into the map) instead of a string per segment.
+    """
+    if raw == "lazy":
+        yield from _iter_segments_lazy(stream, chunk_size)
+        return
+    if raw not in RAW_MODES:
+        raise ValueError(f"Unknown raw mode: {raw}")
+    keep = raw == "keep"
+    for batch, element_sep, _, _ in _scan(stream, chunk_size):
+        for raw_seg in batch:
+            raw_seg = raw_seg.strip()
+            if not raw_seg:
+                continue
+            if raw_seg[:3] == "ISA" and _starts_isa(raw_seg):
+                raw_seg = raw_seg.replace("\r", "").replace("\n", "")
+            parts = raw_seg.split(element_sep)
+            yield Segment(parts[0].strip(), tuple(parts[1:]), raw_seg if keep else None)
+
+
+def _iter_segments_lazy(stream: MappedSource, chunk_size: int) -> Iterator[Segment]:
+    if not isinstance(stream, MappedSource):
+        raise ValueError("raw='lazy' needs a MappedSource (segments are referenced by byte offset)")
+    ref: Optional[type] = None
+    # no unwrapping reader here, so offsets stay file offsets; record breaks are dropped per segment
+    for batch, element_sep, seg_term, offset in _scan(stream, chunk_size, unwrap=False):
+        if seg_term and (ref is None or ref.source.seg_term != seg_term.encode("ascii")):
+            ref = _raw_ref_type(stream.data, seg_term)
+        step = len(seg_term)
+        for raw_seg in batch:
+            start = offset
+            offset += len(raw_seg) + step
+            stripped = raw_seg.strip()
+            if not stripped:
+                continue
+            start += len(raw_seg) - len(raw_seg.lstrip())
+            if "\n" in stripped or "\r" in stripped:
+                stripped = stripped.replace("\r", "").replace("\n", "")
+            parts = stripped.split(element_sep)
+            yield Segment(parts[0].strip(), tuple(parts[1:]), ref(start))
+
+
+def iter_interchange_segments(
+    stream: TextIO,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    raw: str = "keep",
+) -> Iterator[Iterator[Segment]]:
+    """
+    Yields one segment iterator per ISA…IEA interchange, ready to hand to extract_822.
+    Each iterator must be consumed before advancing to the next interchange.
+    """
+    segments = iter_segments(stream, chunk_size, raw)
+    pending: List[Segment] = []
+
+    def one_interchange(first: Segment) -> Iterator[Segment]:
+        yield first
+        for seg in segments:
+            if seg.tag == "ISA":
+                pending.append(seg)
+                return
+            yield seg
+
+    for seg in segments:
+        pending.append(seg)
+        while pending:
+            group = one_interchange(pending.pop())
+            yield group
+            # drain whatever the caller left unread so the next ISA is reached
+            for _ in group:
+                pass
+
+
+def iter_interchange_texts(stream: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Streaming counterpart of split_interchanges: yields each interchange text without
+    reading the whole file. Memory is bounded by the largest single interchange.
+    """
+    parts: List[str] = []
+    for batch, element_sep, seg_term, _ in _scan(stream, chunk_size):
+        if len(batch) > 1:
+            # bulk batches never contain an ISA or IEA segment
+            parts.append(seg_term.join(batch))
+            parts.append(seg_term)
+            continue
+        raw_seg = batch[0]
+        stripped = raw_seg.lstrip()
+        if parts and _starts_isa(stripped):
+            yield "".join(parts).strip()
+            parts = []
+        parts.append(raw_seg)
+        parts.append(seg_term)
+        if stripped[:3] == "IEA" and stripped[3:4] == element_sep:
+            yield "".join(parts).strip()
+            parts = []
+    if parts:
+        # interchange without IEA runs to the end of the file
+        yield "".join(parts).strip()
+
+
+# -----------------------
+# Push scanner
+# -----------------------
+class SegmentScanner:
+    """
+    Push counterpart of iter_segments for text that arrives in pieces (an HTTP body, a socket):
+    feed(text) returns the Segments that piece completed, close() the unterminated rest.
+
+    Separators are detected from every ISA and fixed-length record files are unwrapped, as in
+    iter_segments. The record layout is decided from the first 8 KB, so nothing is returned
+    before that much has arrived; after that only the unfinished segment is held.
+    """
+
+    def __init__(self, raw: str = "keep"):
+        if raw not in ("keep", "drop"):
+            raise ValueError("SegmentScanner supports raw='keep' or raw='drop'")
+        self._keep = raw == "keep"
+        self._head: Optional[str] = ""  # None once the record layout is known
+        self._records: Optional[FixedRecordReader] = None
+        self._carry = ""  # partial fixed-length record
+        self._buf = ""
+        self._element_sep: Optional[str] = None
+        self._seg_term: Optional[str] = None
+        self._closed = False
+
+    def feed(self, text: str) -> List[Segment]:
+        if self._closed:
+            raise ValueError("feed() after close()")
+        if self._head is not None:
+            self._head += text
+            if len(self._head) < _RECORD_PEEK:
+                return []
+            text = self._detect_records()
+        return self._segments(self._unwrap(text, False), False)
+
+    def close(self) -> List[Segment]:
+        if self._closed:
+            return []
+        self._closed = True
+        text = self._detect_records() if self._head is not None else ""
+        return self._segments(self._unwrap(text, True), True)
+
+    def _detect_records(self) -> str:
+        # same rule as unwrap_fixed_records
+        head, self._head = self._head, None
+        if _record_length(head) is not None:
+            flat = head.replace("\r", "").replace("\n", "")
+            try:
+                _, _, seg_term, _ = _locate_isa_separators(flat, flat.find("ISA"))
+            except ValueError:
+                seg_term = None
+            if seg_term is not None and seg_term not in "\r\n":
+                self._records = FixedRecordReader("", None, seg_term)
+        return head
+
+    def _unwrap(self, text: str, final: bool) -> str:
+        if self._records is None:
+            return text
+        text = self._carry + text
+        cut = len(text) if final else text.rfind("\n") + 1
+        self._carry = text[cut:]
+        return self._records._unwrap(text[:cut]) if cut else ""
+
+    def _emit(self, out: List[Segment], raw_seg: str) -> None:
+        raw_seg = raw_seg.strip()
+        if not raw_seg:
+            return
+        if raw_seg[:3] == "ISA" and _starts_isa(raw_seg):
+            raw_seg = raw_seg.replace("\r", "").replace("\n", "")
+        parts = raw_seg.split(self._element_sep)
+        out.append(Segment(parts[0].strip(), tuple(parts[1:]), raw_seg if self._keep else None))
+
+    def _segments(self, text: str, final: bool) -> List[Segment]:
+        # the segment loop of _scan, over the buffered text instead of stream reads
+        buf = self._buf + text
+        pos = 0
+        out: List[Segment] = []
+        while True:
+            seg_term = self._seg_term
+            if seg_term is None:
+                i = buf.find("ISA", pos)
+                if i == -1:
+                    # keep a possible partial "IS" for the next piece
+                    pos = len(buf) if final else max(pos, len(buf) - 2)
+                    break
+                try:
+                    self._element_sep, _, self._seg_term, term_pos = _locate_isa_separators(buf, i)
+                except ValueError:
+                    if final:
+                        raise
+                    pos = i
+                    break
+                self._emit(out, buf[i:term_pos])
+                pos = term_pos + 1
+                continue
+
+            last = buf.rfind(seg_term, pos)
+            if last != -1:
+                isa = buf.find("ISA", pos, last)
+                iea = buf.find("IEA", pos, last)
+                marker = min(isa, iea) if isa != -1 and iea != -1 else max(isa, iea)
+                end = last if marker == -1 else buf.rfind(seg_term, pos, marker)
+                if end != -1:
+                    for raw_seg in buf[pos:end].split(seg_term):
+                        self._emit(out, raw_seg)
+                    pos = end + 1
+                    continue
+            elif not final:
+                break
+
+            j = buf.find(seg_term, pos)
+            raw_seg = buf[pos:j] if j != -1 else buf[pos:]
+            stripped = raw_seg.lstrip()
+            if _starts_isa(stripped):
+                # next interchange without IEA: re-detect, separators may differ
+                pos += len(raw_seg) - len(stripped)
+                self._seg_term = None
+                continue
+            if j == -1:
+                # unterminated tail at close()
+                self._emit(out, raw_seg)
+                pos = len(buf)
+                break
+            pos = j + 1
+            self._emit(out, raw_seg)
+            if stripped[:3] == "IEA" and stripped[3:4] == self._element_sep:
+                self._seg_term = None
+        self._buf = buf[pos:]
+        return out
@@ -1,64 +1,26 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import gzip
-from dataclasses import dataclass, field, asdict
+from concurrent.futures import Executor
+from dataclasses import asdict
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
-
-
-# -----------------------
-# Data Model
-# -----------------------
-@dataclass
-class Balance:
-    balance_type: Optional[str] = None
-    balance_code: Optional[str] = None
-    amount: Optional[str] = None
-    raw: Optional[str] = None
-
-
-@dataclass
-class ServiceCharge:
-    service_class: Optional[str] = None
-    service_code: Optional[str] = None
-    quantity_basis: Optional[str] = None
-    charge_amount: Optional[str] = None
-    rate: Optional[str] = None
-    units: Optional[str] = None
-    description: Optional[str] = None
-    raw: Optional[str] = None
-
-
-@dataclass
-class Account:
-    account_id: Optional[str] = None
-    account_desc: Optional[str] = None
-    currency: Optional[str] = None
-    ent: Optional[List[str]] = None
-    parties: List[Dict[str, Any]] = field(default_factory=list)
-    balances: List[Balance] = field(default_factory=list)
-    service_charges: List[ServiceCharge] = field(default_factory=list)
-
-
-@dataclass
-class Transaction822:
-    control_number: Optional[str] = None
-    bgn: Optional[List[str]] = None
-    dtm: List[List[str]] = field(default_factory=list)
-    accounts: List[Account] = field(default_factory=list)
-
-
-@dataclass
-class Interchange:
-    isa: Optional[List[str]] = None
-    gs: Optional[List[str]] = None
-    transactions_822: List[Transaction822] = field(default_factory=list)
-
-
-@dataclass
-class EDI822Document:
-    interchanges: List[Interchange] = field(default_factory=list)
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple, Union
+
+from src.x12_822 import (
+    Account,
+    Balance,
+    EDI822Document,
+    Interchange,
+    ServiceCharge,
+    Transaction822,
+    extract_822,
+)
+from src.x12_async import DEFAULT_QUEUE_SIZE, stream_from_thread
+from src.x12_parallel import parallel_map_ordered
+from src.x12_tokenizer import RAW_MODES, MappedSource, Segment, iter_interchange_segments, iter_interchange_texts
 
 
 # -----------------------
@@ -129,11 +91,15 @@ def _normalize_isa_newlines(interchange: str, seg_term: str) -> str:
     term = interchange.find(seg_term, i)
     if term == -1:
         return interchange
-    isa = interchange[i:term + 1].replace("\r", "").replace("\n", "")
+    isa = interchange[i:term + 1]
+    if "\n" not in isa and "\r" not in isa:
+        # already flat (fixed-record files are unwrapped by the tokenizer)
+        return interchange
+    isa = isa.replace("\r", "").replace("\n", "")
     return interchange[:i] + isa + interchange[term + 1:]
 
 
-def parse_segments_from_interchange(interchange: str) -> List[Dict[str, Any]]:
+def parse_segments_from_interchange(interchange: str) -> List[Segment]:
     isa_pos = interchange.find("ISA")
     if isa_pos == -1:
         raise ValueError("No ISA found in interchange")
@@ -141,102 +107,76 @@ def parse_segments_from_interchange(interchange: str) -> List[Dict[str, Any]]:
     element_sep, _, seg_term = detect_separators_from_isa(interchange, isa_pos)
     interchange = _normalize_isa_newlines(interchange, seg_term)
 
-    segments: List[Dict[str, Any]] = []
+    segments: List[Segment] = []
     for raw_seg in interchange.split(seg_term):
         raw_seg = raw_seg.strip()
         if not raw_seg:
             continue
         parts = raw_seg.split(element_sep)
-        segments.append({"tag": parts[0].strip(), "elements": parts[1:], "raw": raw_seg})
+        segments.append(Segment(parts[0].strip(), tuple(parts[1:]), raw_seg))
     return segments
 
 
+def parse_interchange(interchange_text: str, raw: str = "keep") -> Interchange:
+    """
+    Parses one ISA…IEA block. Kept at module level so process-pool workers can pickle it.
+    raw="drop" leaves the .raw fields empty (less to pickle back from a pool worker).
+    """
+    segments = parse_segments_from_interchange(interchange_text)
+    if raw == "drop":
+        segments = [seg._replace(raw=None) for seg in segments]
+    return extract_822(segments)
+
+
 # -----------------------
-# 822 extraction
+# Blocking readers (run off the event loop by FileReader)
 # -----------------------
-def _parse_ser(elements: List[str], raw: str) -> ServiceCharge:
-    sc = ServiceCharge(raw=raw)
-    sc.service_class = elements[0] if len(elements) > 0 else None
-    sc.service_code = elements[1] if len(elements) > 1 else None
-    sc.quantity_basis = elements[2] if len(elements) > 2 else None
-    sc.charge_amount = elements[3] if len(elements) > 3 else None
-    sc.rate = elements[4] if len(elements) > 4 else None
-    sc.units = elements[5] if len(elements) > 5 else None
-    sc.description = elements[6] if len(elements) > 6 else None
-    return sc
-
-
-def _parse_bln(elements: List[str], raw: str) -> Balance:
-    b = Balance(raw=raw)
-    b.balance_type = elements[0] if len(elements) > 0 else None
-    b.balance_code = elements[1] if len(elements) > 1 else None
-    b.amount = elements[-1] if len(elements) > 0 else None
-    return b
-
-
-def extract_822(segments: List[Dict[str, Any]]) -> Interchange:
-    ic = Interchange()
-    current_tx: Optional[Transaction822] = None
-    current_account: Optional[Account] = None
-
-    for seg in segments:
-        tag = seg["tag"]
-        el = seg["elements"]
-
-        if tag == "ISA":
-            ic.isa = el
-        elif tag == "GS":
-            ic.gs = el
-        elif tag == "ST":
-            if len(el) > 0 and el[0] == "822":
-                current_tx = Transaction822(control_number=(el[1] if len(el) > 1 else None))
-                ic.transactions_822.append(current_tx)
-                current_account = None
-            else:
-                current_tx = None
-                current_account = None
-
-        elif current_tx is not None:
-            if tag == "BGN":
-                current_tx.bgn = el
-            elif tag == "DTM":
-                current_tx.dtm.append(el)
-            elif tag == "ENT":
-                current_account = Account(ent=el)
-                current_tx.accounts.append(current_account)
-            elif tag == "N1":
-                party = {
-                    "entity_id_code": el[0] if len(el) > 0 else None,
-                    "name": el[1] if len(el) > 1 else None,
-                    "id_code_qual": el[2] if len(el) > 2 else None,
-                    "id_code": el[3] if len(el) > 3 else None,
-                    "raw": seg["raw"],
-                }
-                if current_account is not None:
-                    current_account.parties.append(party)
-            elif tag == "ACT":
-                if current_account is None:
-                    current_account = Account()
-                    current_tx.accounts.append(current_account)
-                current_account.account_id = el[0] if len(el) > 0 else current_account.account_id
-                current_account.account_desc = el[1] if len(el) > 1 else current_account.account_desc
-            elif tag == "CUR":
-                if current_account is None:
-                    current_account = Account()
-                    current_tx.accounts.append(current_account)
-                current_account.currency = el[1] if len(el) > 1 else current_account.currency
-            elif tag == "BLN":
-                if current_account is None:
-                    current_account = Account()
-                    current_tx.accounts.append(current_account)
-                current_account.balances.append(_parse_bln(el, seg["raw"]))
-            elif tag == "SER":
-                if current_account is None:
-                    current_account = Account()
-                    current_tx.accounts.append(current_account)
-                current_account.service_charges.append(_parse_ser(el, seg["raw"]))
-
-    return ic
+def _open_edi(file_path: str, encoding: str, raw: str = "keep"):
+    path = Path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"Source file not found: {file_path}")
+    if raw not in RAW_MODES:
+        raise ValueError(f"Unknown raw mode: {raw}")
+    if raw == "lazy":
+        if file_path.endswith(".gz"):
+            raise ValueError("raw='lazy' needs an uncompressed file to memory-map")
+        return contextlib.nullcontext(MappedSource(file_path))
+    if file_path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding=encoding, newline="")
+    return open(path, "r", encoding=encoding, newline="")
+
+
+def read_edi822_blocking(
+    file_path: str,
+    encoding: str = "utf-8",
+    workers: Optional[int] = 1,
+    chunksize: int = 1,
+    raw: str = "keep",
+) -> EDI822Document:
+    if raw == "lazy" and workers != 1:
+        raise ValueError("raw='lazy' references the local memory map; use workers=1")
+    doc = EDI822Document()
+    with _open_edi(file_path, encoding, raw) as f:
+        if workers != 1:
+            # workers > 1 (None = one per CPU): interchanges parsed in a process pool, order kept
+            doc.interchanges.extend(parallel_map_ordered(
+                partial(parse_interchange, raw=raw),
+                iter_interchange_texts(f),
+                workers=workers,
+                chunksize=chunksize,
+            ))
+        else:
+            # segments are tokenized chunk by chunk and fed straight into the mapper
+            for segments in iter_interchange_segments(f, raw=raw):
+                doc.interchanges.append(extract_822(segments))
+    return doc
+
+
+def _emit_completed(file_path: str, encoding: str, raw: str, emit: Callable[[Any], None]) -> None:
+    on_complete = lambda ic, obj: emit((ic, obj))
+    with _open_edi(file_path, encoding, raw) as f:
+        for segments in iter_interchange_segments(f, raw=raw):
+            extract_822(segments, on_complete=on_complete)
 
 
 # -----------------------
@@ -244,24 +184,41 @@ def extract_822(segments: List[Dict[str, Any]]) -> Interchange:
 # -----------------------
 class FileReader:
     @staticmethod
-    async def read_edi822(file_path: str, encoding: str = "utf-8") -> EDI822Document:
-        path = Path(file_path)
-        if not path.exists():
-            raise FileNotFoundError(f"Source file not found: {file_path}")
-
-        if file_path.endswith(".gz"):
-            with gzip.open(path, "rt", encoding=encoding, newline="") as f:
-                raw_text = f.read()
-        else:
-            with open(path, "r", encoding=encoding, newline="") as f:
-                raw_text = f.read()
-
-        doc = EDI822Document()
-        for interchange_text in split_interchanges(raw_text):
-            segments = parse_segments_from_interchange(interchange_text)
-            doc.interchanges.append(extract_822(segments))
+    async def read_edi822(
+        file_path: str,
+        encoding: str = "utf-8",
+        workers: Optional[int] = 1,
+        chunksize: int = 1,
+        executor: Optional[Executor] = None,
+        raw: str = "keep",
+    ) -> EDI822Document:
+        """
+        Reads and parses in `executor` (default: the loop's thread pool) so the event loop keeps
+        serving other requests. Pass a ProcessPoolExecutor to keep the parse off this process's GIL.
+
+        raw controls Balance/ServiceCharge/Party .raw: "keep" (str), "lazy" (RawRef into a memory
+        map of the file, decoded on access) or "drop" (None).
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor,
+            partial(read_edi822_blocking, file_path, encoding, workers, chunksize, raw),
+        )
 
-        return doc
+    @staticmethod
+    async def stream_edi822(
+        file_path: str,
+        encoding: str = "utf-8",
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        raw: str = "keep",
+    ) -> AsyncIterator[Tuple[Interchange, Union[Account, Transaction822]]]:
+        """
+        async for (interchange, obj) in ...: each Account as soon as its ACT loop is closed, then its
+        Transaction822 at SE. The interchange already carries ISA/GS and the DTM dates.
+        Parsing runs in a worker thread and pauses when `queue_size` items are waiting.
+        """
+        async for item in stream_from_thread(partial(_emit_completed, file_path, encoding, raw), queue_size):
+            yield item
 
 
 async def main():